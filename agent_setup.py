@@ -3,171 +3,272 @@ Agent definitions and model configurations.
 Author: Ben Walker (BenRWalker@icloud.com)
 """
 
-from agents import Agent, OpenAIChatCompletionsModel
-from config import ollama_client
-from prompts import (
-    INSTRUCTIONS_PROFESSIONAL,
-    INSTRUCTIONS_HUMOROUS,
-    INSTRUCTIONS_CONCISE,
-    SUBJECT_INSTRUCTIONS,
-    HTML_INSTRUCTIONS,
-    EMAIL_MANAGER_INSTRUCTIONS,
-    SALES_MANAGER_INSTRUCTIONS,
-    NAME_CHECK_INSTRUCTIONS,
-    INPUT_GUARDRAIL_INSTRUCTIONS,
-    OUTPUT_GUARDRAIL_INSTRUCTIONS
+import asyncio
+import functools
+from typing import Any, Dict, Optional
+
+from agents import Agent, OpenAIChatCompletionsModel, Runner, function_tool
+from config import (
+    get_llm_client,
+    MODEL1_NAME, MODEL2_NAME, MODEL3_NAME,
+    MODEL1_API_URL, MODEL2_API_URL, MODEL3_API_URL
 )
+from prompts import get_prompt
 
 from models import NameCheckOutput, InputGuardrailOutput, OutputGuardrailOutput
-from email_service import send_html_email_tool
+from email_service import send_html_email
 from logger_config import setup_logger
 
 # Set up logger for this module
 logger = setup_logger('agent_setup')
-logger.info("=" * 60)
+
+_BAR = "=" * 60
+
+logger.info(_BAR)
 logger.info("Initializing Sales Agent System")
-logger.info("=" * 60)
-
-# Create model instances
-logger.info("Creating LLM Model instances")
-try:
-    BASE_MODEL1 = OpenAIChatCompletionsModel(model="mistral:7b", openai_client=ollama_client)
-    logger.info("✓ BASE_MODEL1 (mistral:7b) initialized")
-except Exception as e:
-    logger.error(f"✗ Failed to initialize BASE_MODEL1: {e}", exc_info=True)
-    raise
-
-try:
-    BASE_MODEL2 = OpenAIChatCompletionsModel(model="qwen2.5:3b", openai_client=ollama_client)
-    logger.info("✓ BASE_MODEL2 (qwen2.5:3b) initialized")
-except Exception as e:
-    logger.error(f"✗ Failed to initialize BASE_MODEL2: {e}", exc_info=True)
-    raise
-
-try:
-    BASE_MODEL3 = OpenAIChatCompletionsModel(model="llama3.2:3b", openai_client=ollama_client)
-    logger.info("✓ BASE_MODEL3 (llama3.2:3b) initialized")
-except Exception as e:
-    logger.error(f"✗ Failed to initialize BASE_MODEL3: {e}", exc_info=True)
-    raise
-
-# Create Sales Agents with updated descriptions
-logger.info("Creating specialized sales agents...")
-
-sales_agent1 = Agent(
-    name="Professional Sales Agent",
-    instructions=INSTRUCTIONS_PROFESSIONAL,
-    model=BASE_MODEL1
-)
-logger.info("✓ Professional Sales Agent created (using mistral:7b)")
+logger.info(_BAR)
 
-sales_agent2 = Agent(
-    name="Humorous Sales Agent",
-    instructions=INSTRUCTIONS_HUMOROUS,
-    model=BASE_MODEL2
-)
-logger.info("✓ Humorous Sales Agent created (using llama3.2:1b)")
 
-sales_agent3 = Agent(
-    name="Concise Sales Agent",
-    instructions=INSTRUCTIONS_CONCISE,
-    model=BASE_MODEL3
-)
-logger.info("✓ Concise Sales Agent created (using qwen2.5:3b)")
+def _make_model(model_name: str, base_url: str) -> OpenAIChatCompletionsModel:
+    """Create a chat-completions model bound to the client for its endpoint."""
+    try:
+        model = OpenAIChatCompletionsModel(model=model_name, openai_client=get_llm_client(base_url))
+    except Exception as e:
+        logger.error("✗ Failed to initialize model %s: %s", model_name, e, exc_info=True)
+        raise
+    logger.debug("✓ Model %s initialized", model_name)
+    return model
 
 
-# Create Sales Agent Tools with better descriptions
-logger.info("Creating agent tools...")
+# Models, agents and tools are built lazily on first use and cached, so importing
+# this module does not construct anything a request never touches.
 
-tool1 = sales_agent1.as_tool(
-    tool_name="professional_sales_writer",
-    tool_description="Write a professional, formal cold sales email. Best for B2B, enterprise, serious products."
-)
-logger.debug("Tool created: professional_sales_writer")
+@functools.cache
+def get_base_model1() -> OpenAIChatCompletionsModel:
+    """Return model 1 (mistral:7b by default)."""
+    return _make_model(MODEL1_NAME, MODEL1_API_URL)
 
-tool2 = sales_agent2.as_tool(
-    tool_name="humorous_sales_writer",
-    tool_description="Write a witty, engaging cold sales email with personality. Best for B2C, creative products, when humor is appropriate."
-)
-logger.debug("Tool created: humorous_sales_writer")
 
-tool3 = sales_agent3.as_tool(
-    tool_name="concise_sales_writer",
-    tool_description="Write a brief, direct cold sales email. Best for busy executives, when brevity is important."
-)
-logger.debug("Tool created: concise_sales_writer")
+@functools.cache
+def get_base_model2() -> OpenAIChatCompletionsModel:
+    """Return model 2 (qwen2.5:3b by default)."""
+    return _make_model(MODEL2_NAME, MODEL2_API_URL)
 
-# Create Email Helper Agents
-logger.info("Creating email helper agents...")
 
-subject_writer = Agent(
-    name="Email Subject Writer",
-    instructions=SUBJECT_INSTRUCTIONS,
-    model=BASE_MODEL3
-)
-logger.info("✓ Email Subject Writer agent created")
+@functools.cache
+def get_base_model3() -> OpenAIChatCompletionsModel:
+    """Return model 3 (llama3.2:3b by default)."""
+    return _make_model(MODEL3_NAME, MODEL3_API_URL)
 
-subject_tool = subject_writer.as_tool(
-    tool_name="subject_writer",
-    tool_description="Generate a compelling subject line for an email"
-)
 
-html_converter = Agent(
-    name="HTML Email Converter",
-    instructions=HTML_INSTRUCTIONS,
-    model=BASE_MODEL2
-)
-logger.info("✓ HTML Email Converter agent created")
+# Sales Agents
+@functools.cache
+def get_sales_agent1() -> Agent:
+    """Return the professional sales writer."""
+    agent = Agent(
+        name="Professional Sales Agent",
+        instructions=get_prompt("instructions_professional"),
+        model=get_base_model1()
+    )
+    logger.debug("✓ Professional Sales Agent created (using %s)", MODEL1_NAME)
+    return agent
+
+
+@functools.cache
+def get_sales_agent2() -> Agent:
+    """Return the humorous sales writer."""
+    agent = Agent(
+        name="Humorous Sales Agent",
+        instructions=get_prompt("instructions_humorous"),
+        model=get_base_model2()
+    )
+    logger.debug("✓ Humorous Sales Agent created (using %s)", MODEL2_NAME)
+    return agent
+
+
+@functools.cache
+def get_sales_agent3() -> Agent:
+    """Return the concise sales writer."""
+    agent = Agent(
+        name="Concise Sales Agent",
+        instructions=get_prompt("instructions_concise"),
+        model=get_base_model3()
+    )
+    logger.debug("✓ Concise Sales Agent created (using %s)", MODEL3_NAME)
+    return agent
+
+
+# Sales Agent Tools
+async def parallel_sales_writer(prompt: str) -> str:
+    """Draft the requested sales email with all three writing styles concurrently."""
+    writers = [
+        ("Professional", get_sales_agent1()),
+        ("Humorous", get_sales_agent2()),
+        ("Concise", get_sales_agent3())
+    ]
+    logger.info("Running %d sales writers in parallel", len(writers))
+    results = await asyncio.gather(
+        *(Runner.run(agent, prompt) for _, agent in writers),
+        return_exceptions=True
+    )
+
+    drafts = []
+    for (style, _), result in zip(writers, results):
+        if isinstance(result, Exception):
+            logger.error("%s sales writer failed: %s", style, result)
+            continue
+        drafts.append(f"### {style} draft\n\n{str(result.final_output).strip()}")
+
+    if not drafts:
+        raise RuntimeError("All sales writers failed to produce drafts")
+
+    return "\n\n".join(drafts)
+
 
-html_tool = html_converter.as_tool(
-    tool_name="html_converter",
-    tool_description="Convert plain text email to HTML format"
+parallel_sales_writer_tool = function_tool(
+    parallel_sales_writer,
+    name_override="parallel_sales_writer",
+    description_override=(
+        "Write professional, humorous and concise versions of a cold sales email in parallel. "
+        "Returns all drafts so the best one can be chosen."
+    )
 )
 
+# Sales agent tools list - the manager fans out to all writers in one call
+sales_tools = [parallel_sales_writer_tool]
+
+
+# Email Helper Agents
+@functools.cache
+def get_subject_writer() -> Agent:
+    """Return the subject line writer."""
+    agent = Agent(
+        name="Email Subject Writer",
+        instructions=get_prompt("subject_instructions"),
+        model=get_base_model3()
+    )
+    logger.debug("✓ Email Subject Writer agent created")
+    return agent
+
+
+@functools.cache
+def get_html_converter() -> Agent:
+    """Return the plain text to HTML converter."""
+    agent = Agent(
+        name="HTML Email Converter",
+        instructions=get_prompt("html_instructions"),
+        model=get_base_model2()
+    )
+    logger.debug("✓ HTML Email Converter agent created")
+    return agent
+
+
+@functools.cache
+def get_template_adapter() -> Agent:
+    """Return the agent that adapts a cached best draft to a similar request."""
+    agent = Agent(
+        name="Template Adapter",
+        instructions=get_prompt("template_adapter_instructions"),
+        model=get_base_model3()
+    )
+    logger.debug("✓ Template Adapter agent created (using %s)", MODEL3_NAME)
+    return agent
+
+
+async def prepare_and_send(draft: str, recipient_email: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write a subject line and HTML version of an approved email, then send it.
+    
+    Args:
+        draft: The complete plain text email to send
+        recipient_email: Optional recipient address; defaults to TO_EMAIL
+    """
+    # Subject writing and HTML conversion are independent, so run them concurrently
+    subject_result, html_result = await asyncio.gather(
+        Runner.run(get_subject_writer(), draft),
+        Runner.run(get_html_converter(), draft)
+    )
+    subject = str(subject_result.final_output).strip()
+    html_body = str(html_result.final_output).strip()
+    logger.info("Prepared email for sending with subject: %s", subject)
+    return await send_html_email(subject, html_body, recipient_email=recipient_email)
+
+
+prepare_and_send_tool = function_tool(prepare_and_send)
+
+
 # Email Manager Agent
-logger.info("Creating Email Manager agent...")
-email_tools = [subject_tool, html_tool, send_html_email_tool]
-emailer_agent = Agent(
-    name="Email Manager",
-    instructions=EMAIL_MANAGER_INSTRUCTIONS,
-    tools=email_tools,
-    model=BASE_MODEL1,
-    handoff_description="Format and send the email (generates subject, converts to HTML, sends)"
-)
-logger.info("✓ Email Manager agent created with 3 tools")
+def get_email_tools() -> list:
+    """Return the tools available to the Email Manager."""
+    return [prepare_and_send_tool]
+
+
+@functools.cache
+def get_emailer_agent() -> Agent:
+    """Return the Email Manager agent."""
+    email_tools = get_email_tools()
+    agent = Agent(
+        name="Email Manager",
+        instructions=get_prompt("email_manager_instructions"),
+        tools=email_tools,
+        model=get_base_model1(),
+        handoff_description="Format and send the email (generates subject and HTML in parallel, sends)"
+    )
+    logger.debug("✓ Email Manager agent created with %d tools", len(email_tools))
+    return agent
+
+
+@functools.cache
+def get_email_formatter() -> Agent:
+    """Return the tool-less agent that polishes approved drafts; it has no way to send mail."""
+    agent = Agent(
+        name="Email Formatter",
+        instructions=get_prompt("email_formatter_instructions"),
+        model=get_base_model1()
+    )
+    logger.debug("✓ Email Formatter agent created")
+    return agent
+
 
 # Guardrail Agents
-logger.info("Creating guardrail agents...")
+@functools.cache
+def get_guardrail_agent() -> Agent:
+    """Return the name check guardrail agent."""
+    agent = Agent(
+        name="Name Check Agent",
+        instructions=get_prompt("name_check_instructions"),
+        model=get_base_model3(),
+        output_type=NameCheckOutput
+    )
+    logger.debug("✓ Name Check guardrail agent created")
+    return agent
 
-guardrail_agent = Agent(
-    name="Name Check Agent",
-    instructions=NAME_CHECK_INSTRUCTIONS,
-    model=BASE_MODEL3,
-    output_type=NameCheckOutput
-)
-logger.info("✓ Name Check guardrail agent created")
 
-input_guardrail_agent = Agent(
-    name="Input Guardrail Agent",
-    instructions=INPUT_GUARDRAIL_INSTRUCTIONS,
-    model=BASE_MODEL3,
-    output_type=InputGuardrailOutput
-)
-logger.info("✓ Input Guardrail agent created")
+@functools.cache
+def get_input_guardrail_agent() -> Agent:
+    """Return the LLM input guardrail agent."""
+    agent = Agent(
+        name="Input Guardrail Agent",
+        instructions=get_prompt("input_guardrail_instructions"),
+        model=get_base_model3(),
+        output_type=InputGuardrailOutput
+    )
+    logger.debug("✓ Input Guardrail agent created")
+    return agent
 
-output_guardrail_agent = Agent(
-    name="Output Guardrail Agent",
-    instructions=OUTPUT_GUARDRAIL_INSTRUCTIONS,
-    model=BASE_MODEL3,
-    output_type=OutputGuardrailOutput
-)
-logger.info("✓ Output Guardrail agent created")
 
-# Sales agent tools list
-sales_tools = [tool1, tool2, tool3]
+@functools.cache
+def get_output_guardrail_agent() -> Agent:
+    """Return the LLM output guardrail agent."""
+    agent = Agent(
+        name="Output Guardrail Agent",
+        instructions=get_prompt("output_guardrail_instructions"),
+        model=get_base_model3(),
+        output_type=OutputGuardrailOutput
+    )
+    logger.debug("✓ Output Guardrail agent created")
+    return agent
+
 
-logger.info("=" * 60)
-logger.info("Agent System Initialization Complete")
-logger.info(f"Total Agents Created: 9")
-logger.info(f"Total Tools Available: {len(sales_tools)} sales + {len(email_tools)} email")
-logger.info("=" * 60)
+logger.info("Agent factories registered - models and agents are created on first use")
+logger.info(_BAR)
@@ -0,0 +1,52 @@
+"""
+Small in-process caches shared across the Sales Agent modules.
+
+Author: Ben Walker (BenRWalker@icloud.com)
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def content_key(text: str) -> str:
+    """Return a compact, fixed-size cache key for arbitrary text."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache backed by an OrderedDict.
+    
+    Not thread-safe; intended for use from a single asyncio event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value and mark it as most recently used."""
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """Return a snapshot of the entries, least recently used first."""
+        return list(self._data.items())
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -5,6 +5,7 @@ Author: Ben Walker (BenRWalker@icloud.com)
 """
 
 # Modules
+import functools
 import os
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
@@ -16,12 +17,18 @@ logger = setup_logger(__name__)
 set_tracing_disabled(True)
 logger.info("Tracing disabled (local-only mode)")
 
-def setup_env():
-    """Load environment variables from the local .env file."""
+@functools.cache
+def load_env():
+    """Load environment variables from the local .env file (parsed once per process)."""
     load_dotenv()
     logger.info("Environment variables loaded from .env file")
 
 
+def setup_env():
+    """Load environment variables from the local .env file."""
+    load_env()
+
+
 def _require_env(var_name: str) -> str:
     """Return the value of a required environment variable or raise an error."""
     value = os.environ.get(var_name)
@@ -31,25 +38,49 @@ def _require_env(var_name: str) -> str:
             "Ensure your .env or deployment config defines it before starting the app."
         )
     return value
-load_dotenv()
+
+
+load_env()
+
 # API Configuration
-#LLM_API_KEY = _require_env('LLM_API_KEY')
-#LLM_API_URL = _require_env('LLM_API_URL')
-LLM_API_KEY = "ollama"
-LLM_API_URL = "http://192.168.1.20:11434/v1"
+# Any OpenAI-compatible server works here: Ollama, or vLLM for continuous batching
+# of concurrent agent requests (python -m vllm.entrypoints.openai.api_server ...).
+LLM_API_KEY = os.environ.get('LLM_API_KEY', 'ollama')
+LLM_API_URL = os.environ.get('LLM_API_URL', 'http://192.168.1.20:11434/v1')
+
+# Model names, overridable to run quantized builds (e.g. mistral:7b-instruct-q4_K_M on
+# Ollama, or an AWQ/GPTQ checkpoint name on vLLM) without code changes
+MODEL1_NAME = os.environ.get('LLM_MODEL1', 'mistral:7b')
+MODEL2_NAME = os.environ.get('LLM_MODEL2', 'qwen2.5:3b')
+MODEL3_NAME = os.environ.get('LLM_MODEL3', 'llama3.2:3b')
+
+# Optional per-model endpoints (e.g. one vLLM server per model on its own port).
+# Models without a dedicated endpoint fall back to LLM_API_URL.
+MODEL1_API_URL = os.environ.get('LLM_API_URL_MODEL1') or LLM_API_URL
+MODEL2_API_URL = os.environ.get('LLM_API_URL_MODEL2') or LLM_API_URL
+MODEL3_API_URL = os.environ.get('LLM_API_URL_MODEL3') or LLM_API_URL
 
 logger.info(f"Configuration module initialized with base url: {LLM_API_URL}")
 
-# Create LLM client
-try:
-    ollama_client = AsyncOpenAI(
-        base_url=LLM_API_URL,
-        api_key=LLM_API_KEY
-    )
-    logger.info("Ollama client configured successfully")
-except Exception as e:
-    logger.error(
-        "Failed to configure Ollama client. Double-check that the URL/token are valid and reachable.",
-        exc_info=True
-    )
-    raise
\ No newline at end of file
+
+@functools.cache
+def get_llm_client(base_url: str = LLM_API_URL) -> AsyncOpenAI:
+    """
+    Return the LLM client for an OpenAI-compatible endpoint.
+    
+    Clients are created on first use and shared per endpoint, so models served
+    by the same server share one connection pool.
+    """
+    try:
+        client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=LLM_API_KEY
+        )
+        logger.info(f"LLM client configured successfully for {base_url}")
+        return client
+    except Exception as e:
+        logger.error(
+            f"Failed to configure LLM client for {base_url}. Double-check that the URL/token are valid and reachable.",
+            exc_info=True
+        )
+        raise
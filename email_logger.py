@@ -10,6 +10,8 @@ import asyncio
 # Create dedicated email activity logger
 email_logger = setup_logger('email_activity', use_json=False)
 
+_BAR = "=" * 60
+
 
 def log_email_operation(operation_name: str):
     """
@@ -21,9 +23,9 @@ def log_email_operation(operation_name: str):
     def decorator(func):
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            email_logger.info(f"{'='*60}")
+            email_logger.info(_BAR)
             email_logger.info(f"Starting: {operation_name}")
-            email_logger.info(f"{'='*60}")
+            email_logger.info(_BAR)
             
             # Log function arguments
             if args:
@@ -45,15 +47,15 @@ def log_email_operation(operation_name: str):
                 email_logger.error(f"✗ {operation_name} failed: {e}", exc_info=True)
                 raise
             finally:
-                email_logger.info(f"{'='*60}")
+                email_logger.info(_BAR)
                 email_logger.info(f"Finished: {operation_name}")
-                email_logger.info(f"{'='*60}\n")
+                email_logger.info(f"{_BAR}\n")
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            email_logger.info(f"{'='*60}")
+            email_logger.info(_BAR)
             email_logger.info(f"Starting: {operation_name}")
-            email_logger.info(f"{'='*60}")
+            email_logger.info(_BAR)
             
             # Log function arguments
             if args:
@@ -75,9 +77,9 @@ def log_email_operation(operation_name: str):
                 email_logger.error(f"✗ {operation_name} failed: {e}", exc_info=True)
                 raise
             finally:
-                email_logger.info(f"{'='*60}")
+                email_logger.info(_BAR)
                 email_logger.info(f"Finished: {operation_name}")
-                email_logger.info(f"{'='*60}\n")
+                email_logger.info(f"{_BAR}\n")
         
         # Return appropriate wrapper based on whether function is async
         if asyncio.iscoroutinefunction(func):
@@ -5,68 +5,120 @@ Author : Ben Walker (BenRWalker@icloud.com)
 """
 
 # Modules
-import asyncio
+import functools
 import os
+from dataclasses import dataclass
 from typing import Dict, Optional, Any
 
-import sendgrid
-from dotenv import load_dotenv
-from sendgrid.helpers.mail import Content, Email, Mail, To
+import httpx
+import orjson
 
 from agents import function_tool
+from config import load_env
 from logger_config import setup_logger
 
 # Set up logger for this module
 logger = setup_logger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (no-op if already loaded by another module)
+load_env()
+
+
+
+@dataclass(frozen=True, slots=True)
+class EmailConfig:
+    """Email settings read from the environment once at import"""
+    sendgrid_key: Optional[str]
+    from_email: Optional[str]
+    to_email: Optional[str]
+
+    @classmethod
+    def from_env(cls) -> "EmailConfig":
+        return cls(
+            sendgrid_key=os.environ.get('SENDGRID') or os.environ.get('SENDGRID_API_KEY'),
+            from_email=os.environ.get('FROM_EMAIL'),
+            to_email=os.environ.get('TO_EMAIL')
+        )
+
 
 # Get email configuration from environment
-from_email: Optional[str] = os.environ.get('FROM_EMAIL')
-to_email: Optional[str] = os.environ.get('TO_EMAIL')
+EMAIL_CONFIG = EmailConfig.from_env()
+
+logger.info(f"Email service configured - From: {EMAIL_CONFIG.from_email}, To: {EMAIL_CONFIG.to_email}")
+
+SENDGRID_API_BASE = "https://api.sendgrid.com"
+SENDGRID_SEND_PATH = "/v3/mail/send"
+
+
+@functools.cache
+def _get_sendgrid_client() -> httpx.AsyncClient:
+    """Return the shared SendGrid client, created on first send and reused afterwards."""
+    # Requests run on the event loop and multiplex over one kept-alive HTTP/2
+    # connection, so the TLS handshake is paid once rather than per email
+    return httpx.AsyncClient(
+        base_url=SENDGRID_API_BASE,
+        http2=True,
+        timeout=30,
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60)
+    )
+
+
+async def close_sendgrid_client() -> None:
+    """
+    Close the shared SendGrid client, if it was ever created.
+    
+    Await this on the event loop that sent the emails, before that loop shuts down - the
+    client's pooled connections belong to it. A later send creates a fresh client.
+    """
+    if not _get_sendgrid_client.cache_info().currsize:
+        return
+    client = _get_sendgrid_client()
+    _get_sendgrid_client.cache_clear()
+    await client.aclose()
 
-logger.info(f"Email service configured - From: {from_email}, To: {to_email}")
 
 async def send_html_email(subject: str, html_body: str, recipient_email: Optional[str] = None) -> Dict[str, Any]:
     """Send an email with the given subject and HTML body to all sales prospects."""
     logger.info(f"Attempting to send email with subject: {subject}")
     logger.debug(f"Email body length: {len(html_body)} characters")
     
-    sendgrid_api_key = os.environ.get('SENDGRID') or os.environ.get('SENDGRID_API_KEY')
+    config = EMAIL_CONFIG
+    sendgrid_api_key = config.sendgrid_key
     if not sendgrid_api_key:
         logger.error("SENDGRID / SENDGRID_API_KEY not found in environment variables")
         return {"status": "error", "message": "SENDGRID / SENDGRID_API_KEY not configured"}
     
-    if not from_email:
-        logger.error("FROM_EMAIL not configured", extra={"from_email": from_email})
+    if not config.from_email:
+        logger.error("FROM_EMAIL not configured", extra={"from_email": config.from_email})
         return {"status": "error", "message": "FROM_EMAIL not configured"}
 
-    target_recipient = recipient_email or to_email
+    target_recipient = recipient_email or config.to_email
     if not target_recipient:
         logger.error(
             "No recipient email specified",
-            extra={"recipient_email": recipient_email, "default_to_email": to_email}
+            extra={"recipient_email": recipient_email, "default_to_email": config.to_email}
         )
         return {"status": "error", "message": "Recipient email not provided"}
     
-    def _send_email_request() -> Dict[str, Any]:
-        sg = sendgrid.SendGridAPIClient(api_key=sendgrid_api_key)
-        from_email_obj = Email(from_email)
-        to_email_obj = To(target_recipient)
-        content = Content("text/html", html_body)
-        mail = Mail(from_email_obj, to_email_obj, subject, content)
-        response = sg.client.mail.send.post(request_body=mail.get())
-        return {
-            "status_code": response.status_code,
-            "headers": getattr(response, "headers", {}) or {}
-        }
+    payload = {
+        "personalizations": [{"to": [{"email": target_recipient}]}],
+        "from": {"email": config.from_email},
+        "subject": subject,
+        "content": [{"type": "text/html", "value": html_body}]
+    }
     
     try:
-        send_result = await asyncio.to_thread(_send_email_request)
-        status_code = send_result.get("status_code")
-        headers = send_result.get("headers", {})
-        message_id = headers.get("X-Message-Id") or headers.get("x-message-id")
+        response = await _get_sendgrid_client().post(
+            SENDGRID_SEND_PATH,
+            content=orjson.dumps(payload),
+            headers={
+                "Authorization": f"Bearer {sendgrid_api_key}",
+                "Content-Type": "application/json"
+            }
+        )
+        response.raise_for_status()
+        status_code = response.status_code
+        message_id = response.headers.get("X-Message-Id")
         logger.info(
             "Email sent successfully",
             extra={
@@ -80,7 +132,7 @@ async def send_html_email(subject: str, html_body: str, recipient_email: Optiona
             "status": "success",
             "status_code": status_code,
             "to": target_recipient,
-            "from": from_email,
+            "from": config.from_email,
             "subject": subject,
             "message_id": message_id,
             "body_length": len(html_body)
@@ -91,7 +143,7 @@ async def send_html_email(subject: str, html_body: str, recipient_email: Optiona
             exc_info=True,
             extra={
                 'subject': subject,
-                'to': to_email
+                'to': target_recipient
             }
         )
         return {
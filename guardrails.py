@@ -3,72 +3,282 @@ Input and output guardrails for agent safety.
 Author: Ben Walker (BenRWalker@icloud.com)
 """
 
+import logging
 import os
 import re
-from typing import List
+from typing import List, Optional
 from agents import input_guardrail, output_guardrail, GuardrailFunctionOutput
+from cache_utils import LRUCache, content_key
 from logger_config import setup_logger
 from models import InputGuardrailOutput, OutputGuardrailOutput
 
 logger = setup_logger('guardrails', use_json=True)
 
+try:
+    import hyperscan
+except ImportError:  # Optional accelerator - the stdlib union scan is used without it
+    hyperscan = None
+
 # Security thresholds
 RISK_THRESHOLD = float(os.environ.get('RISK_THRESHOLD', '0.75'))
 TOXICITY_THRESHOLD = float(os.environ.get('TOXICITY_THRESHOLD', '0.8'))
 
-# Regex patterns for prompt injection
+# Upper bound on characters scanned per check, bounding worst-case regex time
+MAX_GUARDRAIL_LEN = int(os.environ.get('MAX_GUARDRAIL_LEN', '8192'))
+
+# Shortest text an input pattern can match (an email such as "a@b.co")
+MIN_INPUT_SCAN_LEN = 6
+# Shortest text a leak pattern can match ("apikey:" plus one character)
+MIN_LEAK_LEN = 8
+# Upper bound on characters of model output scanned for leaks; longer output is blocked
+MAX_SCAN_BYTES = int(os.environ.get('MAX_SCAN_BYTES', '65536'))
+
+# Guardrail verdicts are deterministic per text, so repeated inputs/outputs reuse them
+GUARDRAIL_CACHE_SIZE = 1024
+_input_verdict_cache = LRUCache(GUARDRAIL_CACHE_SIZE)
+_output_verdict_cache = LRUCache(GUARDRAIL_CACHE_SIZE)
+
+# Regex patterns for prompt injection, compiled once as (compiled, source) pairs
 PROMPT_INJECTION_PATTERNS = [
-    r'ignore\s+all\s+previous\s+instructions',
-    r'forget\s+your\s+role',
-    r'you\s+are\s+now\s+a',
-    r'<\|im_start\|>system',
-    r'\[INST\].*ignore',
+    (re.compile(pattern, re.IGNORECASE), pattern)
+    for pattern in (
+        r'ignore\s+all\s+previous\s+instructions',
+        r'forget\s+your\s+role',
+        r'you\s+are\s+now\s+a',
+        r'<\|im_start\|>system',
+        r'\[INST\].*ignore',
+    )
 ]
 
 # PII patterns
 PII_PATTERNS = [
-    r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
-    r'\b\d{16}\b',  # Credit card
-    r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # Phone
-    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # Email
+    (re.compile(pattern), pattern)
+    for pattern in (
+        r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
+        r'\b\d{16}\b',  # Credit card
+        r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # Phone
+        r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # Email
+    )
+]
+
+# Credential leak patterns for model output
+LEAK_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), pattern)
+    for pattern in (
+        r'api[_-]?key[:=]\s*["\']?[^\s"\'\n]+',
+        r'password[:=]\s*["\']?[^\s"\'\n]+',
+    )
 ]
 
 
-def heuristic_injection_check(text: str) -> tuple[bool, List[str]]:
-    """Check for obvious prompt injection patterns"""
-    detected_patterns = []
-    text_lower = text.lower()
+def _build_union_pattern(patterns: List[tuple[re.Pattern, str]], flags: int = 0) -> re.Pattern:
+    """Combine a pattern group into one alternation so clean text is scanned in a single pass"""
+    return re.compile("|".join(f"(?:{source})" for _, source in patterns), flags)
+
+
+def _build_hyperscan_db(patterns: List[tuple[re.Pattern, str]], caseless: bool = False):
+    """
+    Compile a pattern group into a Hyperscan database that reports every matching
+    pattern in one pass. Returns (database, scratch), or None when unavailable.
+    """
+    if hyperscan is None:
+        return None
+
+    flags = hyperscan.HS_FLAG_SINGLEMATCH | (hyperscan.HS_FLAG_CASELESS if caseless else 0)
+    try:
+        database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        database.compile(
+            expressions=[source.encode() for _, source in patterns],
+            ids=list(range(len(patterns))),
+            flags=[flags] * len(patterns)
+        )
+        # Scratch space is allocated once and reused for every scan
+        return database, hyperscan.Scratch(database)
+    except Exception as e:
+        logger.warning("Hyperscan database build failed, using regex scan instead: %s", e)
+        return None
+
+
+PROMPT_INJECTION_UNION = _build_union_pattern(PROMPT_INJECTION_PATTERNS, re.IGNORECASE)
+PII_UNION = _build_union_pattern(PII_PATTERNS)
+LEAK_UNION = _build_union_pattern(LEAK_PATTERNS, re.IGNORECASE)
+
+_INJECTION_DB = _build_hyperscan_db(PROMPT_INJECTION_PATTERNS, caseless=True)
+_PII_DB = _build_hyperscan_db(PII_PATTERNS)
+_LEAK_DB = _build_hyperscan_db(LEAK_PATTERNS, caseless=True)
+
+# Every PII pattern needs an '@' or a run of three digits. Text with neither
+# cannot match, which a memchr plus one cheap search detects ~3x faster than the union
+PII_DIGIT_RUN = re.compile(r'\d{3}')
+
+
+def _may_contain_pii(text: str) -> bool:
+    """Cheap linear prefilter: False means no PII pattern can possibly match"""
+    return '@' in text or PII_DIGIT_RUN.search(text) is not None
+
+
+def _hyperscan_matches(hs_db, text: str) -> List[int]:
+    """Return the ids of all patterns matching the text, in pattern order"""
+    database, scratch = hs_db
+    matched_ids: set[int] = set()
+
+    def _on_match(pattern_id, start, end, flags, context):
+        matched_ids.add(pattern_id)
+        # Never halt: a halted scan raises hyperscan.ScanTerminated, and HS_FLAG_SINGLEMATCH
+        # already limits each pattern to one callback, so a full scan stays cheap
+        return None
+
+    database.scan(text.encode("utf-8"), match_event_handler=_on_match, scratch=scratch)
+    return sorted(matched_ids)
+
+
+def _scan_patterns(
+    text: str,
+    union: re.Pattern,
+    patterns: List[tuple[re.Pattern, str]],
+    limit: int | None = None,
+    hs_db: Optional[tuple] = None
+) -> List[str]:
+    """
+    Return the source of every pattern in the group that matches the text.
     
-    for pattern in PROMPT_INJECTION_PATTERNS:
-        if re.search(pattern, text_lower):
-            detected_patterns.append(pattern)
-            logger.warning(f"Injection pattern detected: {pattern}")
+    With Hyperscan installed, all patterns are matched in a single pass. Otherwise the
+    union pattern rejects clean text in one pass and only when it matches are the
+    individual patterns run, so the reported set is identical to a per-pattern scan.
+    At most `limit` patterns are reported.
+    """
+    if hs_db is not None:
+        # Sliced in pattern order, so `limit` picks the same patterns as the regex path
+        matched_ids = _hyperscan_matches(hs_db, text)
+        return [patterns[pattern_id][1] for pattern_id in matched_ids][:limit]
+
+    if not union.search(text):
+        return []
+
+    detected = []
+    for compiled, pattern in patterns:
+        if compiled.search(text):
+            detected.append(pattern)
+            if limit is not None and len(detected) >= limit:
+                break
+    return detected
+
+
+def heuristic_injection_check(text: str, fast_path: bool = True) -> tuple[bool, List[str]]:
+    """
+    Check for obvious prompt injection patterns.
+    
+    Any match blocks the input, so with fast_path the scan stops at the first hit;
+    pass fast_path=False to collect every matching pattern for a full audit.
+    """
+    detected_patterns = _scan_patterns(
+        text[:MAX_GUARDRAIL_LEN],
+        PROMPT_INJECTION_UNION,
+        PROMPT_INJECTION_PATTERNS,
+        limit=1 if fast_path else None,
+        hs_db=_INJECTION_DB
+    )
+    
+    for pattern in detected_patterns:
+        logger.warning("Injection pattern detected: %s", pattern)
     
     return len(detected_patterns) > 0, detected_patterns
 
 
 def heuristic_pii_check(text: str) -> tuple[bool, List[str], float]:
     """Check for PII"""
-    detected_pii = []
+    text = text[:MAX_GUARDRAIL_LEN]
+    if not _may_contain_pii(text):
+        return False, [], 0.0
+
+    detected_pii = _scan_patterns(text, PII_UNION, PII_PATTERNS, hs_db=_PII_DB)
     
-    for pattern in PII_PATTERNS:
-        if re.search(pattern, text):
-            detected_pii.append(pattern)
-            logger.warning(f"PII pattern detected: {pattern}")
+    for pattern in detected_pii:
+        logger.warning("PII pattern detected: %s", pattern)
     
     confidence = min(1.0, len(detected_pii) * 0.3) if detected_pii else 0.0
     return len(detected_pii) > 0, detected_pii, confidence
 
 
-@input_guardrail
-async def comprehensive_input_guardrail(ctx, agent, message):
-    """Simple input guardrail - only blocks obvious attacks"""
-    logger.info(f"Running input guardrail on message length: {len(message)}")
+def _info_dict(
+    has_injection: bool,
+    has_pii: bool,
+    is_safe: bool,
+    flagged_issues: List[str],
+    risk_score: float
+) -> dict:
+    """
+    Build the input guardrail details with the same keys as InputGuardrailOutput.model_dump().
+    
+    The pydantic model is only built, to validate the payload, when DEBUG logging is on.
+    """
+    details = {
+        "is_safe": is_safe,
+        "is_prompt_injection": has_injection,
+        "contains_pii": has_pii,
+        "is_off_topic": False,
+        "is_harmful": False,
+        "risk_score": risk_score,
+        "flagged_issues": flagged_issues,
+        "sanitized_input": None
+    }
+    if logger.isEnabledFor(logging.DEBUG):
+        return InputGuardrailOutput(**details).model_dump()
+    return details
+
+
+def _output_info_dict(detected_leaks: List[str]) -> dict:
+    """Build the output guardrail details with the same keys as OutputGuardrailOutput.model_dump()"""
+    details = {
+        "is_safe": not detected_leaks,
+        "contains_sensitive_data": bool(detected_leaks),
+        "is_harmful_content": False,
+        "is_hallucination": False,
+        "is_off_topic": False,
+        "toxicity_score": 0.0,
+        "flagged_issues": [f"leak:{pattern}" for pattern in detected_leaks],
+        "redacted_output": None
+    }
+    if logger.isEnabledFor(logging.DEBUG):
+        return OutputGuardrailOutput(**details).model_dump()
+    return details
+
+
+def evaluate_input_guardrail(message: str) -> GuardrailFunctionOutput:
+    """Run the input safety checks on a message and return the guardrail verdict"""
+    logger.info("Running input guardrail on message length: %d", len(message))
+
+    # Text beyond the scan window is never checked, so oversized input is refused outright
+    if len(message) > MAX_GUARDRAIL_LEN:
+        logger.error(
+            "Input blocked - message length %d exceeds %d characters", len(message), MAX_GUARDRAIL_LEN
+        )
+        return GuardrailFunctionOutput(
+            output_info={
+                "blocked": True,
+                "reason": "Input exceeds maximum length",
+                "details": _info_dict(
+                    has_injection=False,
+                    has_pii=False,
+                    is_safe=False,
+                    flagged_issues=[f"length:{len(message)}>{MAX_GUARDRAIL_LEN}"],
+                    risk_score=1.0
+                )
+            },
+            tripwire_triggered=True
+        )
     
-    # Check for prompt injection
-    has_injection, injection_issues = heuristic_injection_check(message)
-    # Check for PII
-    has_pii, pii_issues, pii_confidence = heuristic_pii_check(message)
+    if len(message) < MIN_INPUT_SCAN_LEN:
+        # Too short for any pattern to match, so skip the scans
+        has_injection, injection_issues = False, []
+        has_pii, pii_issues, pii_confidence = False, [], 0.0
+    else:
+        # Check for prompt injection - the full pattern audit is only worth it for debugging
+        has_injection, injection_issues = heuristic_injection_check(
+            message, fast_path=not logger.isEnabledFor(logging.DEBUG)
+        )
+        # Check for PII
+        has_pii, pii_issues, pii_confidence = heuristic_pii_check(message)
 
     flagged_issues: List[str] = []
     if has_injection:
@@ -84,43 +294,42 @@ async def comprehensive_input_guardrail(ctx, agent, message):
     if not flagged_issues:
         risk_score = 0.1
 
-    guardrail_output = InputGuardrailOutput(
+    details = _info_dict(
+        has_injection=has_injection,
+        has_pii=has_pii,
         is_safe=not (has_injection or (has_pii and pii_confidence > 0.7)),
-        is_prompt_injection=has_injection,
-        contains_pii=has_pii,
-        is_off_topic=False,
-        is_harmful=False,
-        risk_score=risk_score,
         flagged_issues=flagged_issues,
-        sanitized_input=None
+        risk_score=risk_score
     )
 
-    logger.info(
-        "Input guardrail evaluation",
-        extra={
-            "issues": flagged_issues,
-            "risk_score": guardrail_output.risk_score
-        }
-    )
+    # Skip building the extra payload when INFO is filtered out
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Input guardrail evaluation",
+            extra={
+                "issues": flagged_issues,
+                "risk_score": risk_score
+            }
+        )
 
     if has_injection:
-        logger.error(f"Input blocked - prompt injection detected: {injection_issues}")
+        logger.error("Input blocked - prompt injection detected: %s", injection_issues)
         return GuardrailFunctionOutput(
             output_info={
                 "blocked": True,
                 "reason": "Prompt injection pattern detected",
-                "details": guardrail_output.model_dump()
+                "details": details
             },
             tripwire_triggered=True
         )
     
     if has_pii and pii_confidence > 0.7:
-        logger.warning(f"PII detected: {pii_issues}")
+        logger.warning("PII detected: %s", pii_issues)
         return GuardrailFunctionOutput(
             output_info={
                 "blocked": True,
                 "reason": "PII detected in input",
-                "details": guardrail_output.model_dump()
+                "details": details
             },
             tripwire_triggered=True
         )
@@ -130,57 +339,84 @@ async def comprehensive_input_guardrail(ctx, agent, message):
     return GuardrailFunctionOutput(
         output_info={
             "blocked": False,
-            "details": guardrail_output.model_dump()
+            "details": details
         },
         tripwire_triggered=False
     )
 
 
-@output_guardrail
-async def comprehensive_output_guardrail(ctx, agent, output):
-    """Simple output guardrail - only blocks actual data leaks"""
-    logger.info(f"Running output guardrail on output length: {len(str(output))}")
+@input_guardrail
+async def comprehensive_input_guardrail(ctx, agent, message):
+    """Simple input guardrail - only blocks obvious attacks"""
+    cache_key = content_key(str(message))
+    cached_verdict = _input_verdict_cache.get(cache_key)
+    if cached_verdict is not None:
+        logger.info("Input guardrail verdict served from cache")
+        return cached_verdict
+
+    verdict = evaluate_input_guardrail(message)
+    _input_verdict_cache.put(cache_key, verdict)
+    return verdict
+
+
+def evaluate_output_guardrail(output, fast_path: bool = True) -> GuardrailFunctionOutput:
+    """
+    Run the output leak checks on agent output and return the guardrail verdict.
     
-    output_text = str(output)
+    Any leak blocks the output, so with fast_path the scan stops at the first hit.
+    """
+    output_text = output if isinstance(output, str) else str(output)
+    logger.info("Running output guardrail on output length: %d", len(output_text))
+
+    # Text beyond the scan window is never checked, so oversized output is refused outright
+    if len(output_text) > MAX_SCAN_BYTES:
+        logger.error(
+            "Output blocked - output length %d exceeds %d characters", len(output_text), MAX_SCAN_BYTES
+        )
+        details = _output_info_dict([])
+        details["is_safe"] = False
+        details["flagged_issues"] = [f"length:{len(output_text)}>{MAX_SCAN_BYTES}"]
+        return GuardrailFunctionOutput(
+            output_info={
+                "blocked": True,
+                "reason": "Output exceeds maximum length",
+                "details": details
+            },
+            tripwire_triggered=True
+        )
     
     # Check for API keys or passwords
-    leak_patterns = [
-        r'api[_-]?key[:=]\s*["\']?[^\s"\'\n]+',
-        r'password[:=]\s*["\']?[^\s"\'\n]+',
-    ]
-    
     detected_leaks = []
-    for pattern in leak_patterns:
-        if re.search(pattern, output_text, re.IGNORECASE):
-            detected_leaks.append(pattern)
-            logger.error(f"Potential data leak detected: {pattern}")
+    # Shorter output than the shortest possible leak match cannot contain one
+    if len(output_text) >= MIN_LEAK_LEN:
+        detected_leaks = _scan_patterns(
+            output_text,
+            LEAK_UNION,
+            LEAK_PATTERNS,
+            limit=1 if fast_path else None,
+            hs_db=_LEAK_DB
+        )
+    for pattern in detected_leaks:
+        logger.error("Potential data leak detected: %s", pattern)
     
-    guardrail_output = OutputGuardrailOutput(
-        is_safe=not detected_leaks,
-        contains_sensitive_data=bool(detected_leaks),
-        is_harmful_content=False,
-        is_hallucination=False,
-        is_off_topic=False,
-        toxicity_score=0.0,
-        flagged_issues=[f"leak:{pattern}" for pattern in detected_leaks],
-        redacted_output=None
-    )
+    details = _output_info_dict(detected_leaks)
 
-    logger.info(
-        "Output guardrail evaluation",
-        extra={
-            "issues": guardrail_output.flagged_issues,
-            "is_safe": guardrail_output.is_safe
-        }
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Output guardrail evaluation",
+            extra={
+                "issues": details["flagged_issues"],
+                "is_safe": details["is_safe"]
+            }
+        )
     
     if detected_leaks:
-        logger.error(f"Output blocked - {len(detected_leaks)} leak patterns detected")
+        logger.error("Output blocked - %d leak patterns detected", len(detected_leaks))
         return GuardrailFunctionOutput(
             output_info={
                 "blocked": True,
                 "reason": "Potential data leak detected",
-                "details": guardrail_output.model_dump()
+                "details": details
             },
             tripwire_triggered=True
         )
@@ -190,7 +426,22 @@ async def comprehensive_output_guardrail(ctx, agent, output):
     return GuardrailFunctionOutput(
         output_info={
             "blocked": False,
-            "details": guardrail_output.model_dump()
+            "details": details
         },
         tripwire_triggered=False
     )
+
+
+@output_guardrail
+async def comprehensive_output_guardrail(ctx, agent, output):
+    """Simple output guardrail - only blocks actual data leaks"""
+    output_text = output if isinstance(output, str) else str(output)
+    cache_key = content_key(output_text)
+    cached_verdict = _output_verdict_cache.get(cache_key)
+    if cached_verdict is not None:
+        logger.info("Output guardrail verdict served from cache")
+        return cached_verdict
+
+    verdict = evaluate_output_guardrail(output_text, fast_path=not logger.isEnabledFor(logging.DEBUG))
+    _output_verdict_cache.put(cache_key, verdict)
+    return verdict
@@ -7,31 +7,125 @@ Author: Ben Walker (BenRWalker@icloud.com)
 import gradio as gr
 import asyncio
 import csv
-import json
+import functools
+import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from html import escape
-from typing import Tuple, List
+from io import StringIO
+from typing import Callable, List, Optional, Tuple
+import orjson
 from agents import Runner, trace
-from sales_manager import careful_sales_manager
+from openai.types.responses import ResponseTextDeltaEvent
 from agent_setup import (
-    BASE_MODEL1, BASE_MODEL2, BASE_MODEL3,
-    sales_agent1, sales_agent2, sales_agent3,
-    subject_writer, html_converter, emailer_agent, guardrail_agent
+    get_base_model1, get_base_model2, get_base_model3,
+    get_sales_agent1, get_sales_agent2, get_sales_agent3,
+    get_subject_writer, get_html_converter, get_email_formatter, get_guardrail_agent,
+    get_template_adapter
 )
+from cache_utils import LRUCache, content_key
+from email_service import close_sendgrid_client, send_html_email
 from logger_config import setup_logger
-import time
 
 # Set up logger for this module
 logger = setup_logger(__name__)
 
-# Shared progress state used for UI feedback.
-progress_state = {
-    "status": "Ready",
-    "progress": 0
+# Opening fence line (```json ...) and closing fence line of a fenced block
+_CODE_FENCE_RE = re.compile(r"\A```[^\n]*(?:\n|\Z)|^[ \t]*```[^\n]*\Z", re.MULTILINE)
+
+# Recipient CSV header names (lowercase), in lookup priority order
+_NAME_COLUMNS = ("name", "recipient", "recipient name", "full name")
+_EMAIL_COLUMNS = ("email", "email address")
+
+# html.escape(quote=True) plus line breaks, applied in a single translate pass
+_HTML_TABLE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+    "\n": "<br>",
+})
+
+# Mail-merge placeholders (lowercase) and whose details replace them
+_MERGE_TOKENS = {
+    "[recipient name]": "recipient",
+    "[recpient name]": "recipient",
+    "[recipient]": "recipient",
+    "[recipient_first_name]": "recipient",
+    "[your name]": "sender",
+    "[sender name]": "sender",
+    "[from name]": "sender",
+    "[team name]": "sender",
 }
+_MERGE_PATTERN = re.compile("|".join(re.escape(token) for token in _MERGE_TOKENS), re.IGNORECASE)
+
+# "Subject:" / "Subject line -" declaration at the start of any line of a draft
+_SUBJECT_RE = re.compile(r"^subject(?:\s+line)?\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+
+# Caps concurrent LLM calls from the UI so bursts stay under provider rate limits
+MAX_CONCURRENT_LLM = int(os.environ.get('MAX_CONCURRENT_LLM', '4'))
+_LLM_SEM = asyncio.Semaphore(MAX_CONCURRENT_LLM)
+
+# Email-formatter output per approved draft, so re-sending to a new recipient list skips the LLM
+FINALIZED_CACHE_SIZE = 128
+_finalized_cache = LRUCache(FINALIZED_CACHE_SIZE)
+
+# Caps concurrent SendGrid requests when sending to a recipient list
+SEND_CONCURRENCY = 10
+_SEND_SEM = asyncio.Semaphore(SEND_CONCURRENCY)
+
+# Long-lived worker threads for blocking file I/O, so uploads don't spawn a thread each
+IO_POOL_WORKERS = 8
+_IO_POOL = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="sales-io")
+
+# Upper bound on a single agent run before the UI gives up on it
+AGENT_TIMEOUT_SECONDS = 180
+
+# Generation stops waiting for other agents once a draft scores this high (0 disables)
+EARLY_EXIT_SCORE = float(os.environ.get('EARLY_EXIT_SCORE', '85'))
+
+# Similar prompts adapt a previous best draft with the smallest model instead of running
+# every sales agent; similarity is the Jaccard overlap of the prompts' keywords
+PLAN_SIMILARITY = float(os.environ.get('PLAN_SIMILARITY', '0.6'))
+PLAN_CACHE_SIZE = 64
+_plan_templates = LRUCache(PLAN_CACHE_SIZE)
+_KEYWORD_RE = re.compile(r"[a-z0-9]{3,}")
+_STOPWORDS = frozenset({
+    "the", "and", "for", "with", "our", "about", "from", "that", "this", "your", "you",
+    "are", "can", "will", "new", "write", "send", "create", "email", "emails", "sales", "cold"
+})
+
+# Repeat prompts reuse the drafts generated for them instead of re-running every agent
+CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PROMPT_CACHE_TTL_SECONDS = float(os.environ.get('PROMPT_CACHE_TTL_SECONDS', '3600'))
+PROMPT_CACHE_SIZE = 256
+_prompt_cache = LRUCache(PROMPT_CACHE_SIZE)
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+# Prompts referring to dates or times would go stale, so they are never cached
+_TIME_SENSITIVE_RE = re.compile(
+    r"\b(?:today|tonight|tomorrow|yesterday|this\s+week|next\s+week|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|\d{1,2}[:/]\d{1,2})\b",
+    re.IGNORECASE
+)
 
 CTA_KEYWORDS = {"call", "demo", "meeting", "chat", "reply", "schedule", "respond"}
+# All CTA keywords in one pattern, so the body is scanned once (substring match, as before)
+_CTA_RE = re.compile("|".join(re.escape(keyword) for keyword in sorted(CTA_KEYWORDS)))
+
+# Sales agents that draft competing emails for every request
+_SALES_AGENT_LABELS = ("Professional Sales Agent", "Humorous Sales Agent", "Concise Sales Agent")
+_SALES_AGENT_FACTORIES = (get_sales_agent1, get_sales_agent2, get_sales_agent3)
+
+# Factories whose models/agents may hold a cache the UI can clear
+_CACHE_FACTORIES = (
+    get_base_model1, get_base_model2, get_base_model3,
+    get_sales_agent1, get_sales_agent2, get_sales_agent3,
+    get_subject_writer, get_html_converter, get_email_formatter, get_guardrail_agent,
+    get_template_adapter
+)
 
 
 @dataclass
@@ -47,26 +141,22 @@ def _strip_code_fences(text: str) -> str:
     """Remove markdown code fences from text if present."""
     stripped = text.strip()
     if stripped.startswith("```"):
-        lines = stripped.splitlines()
-        if lines and lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines[-1].strip().startswith("```"):
-            lines = lines[:-1]
-        return "\n".join(lines).strip()
+        return _CODE_FENCE_RE.sub("", stripped).strip()
     return stripped
 
 
 def _plain_text_to_html(text: str) -> str:
     """Convert plain text email content to simple paragraph-based HTML."""
-    paragraphs = []
+    buffer = StringIO()
     for block in text.split("\n\n"):
         block = block.strip()
         if not block:
             continue
-        paragraphs.append(f"<p>{escape(block).replace('\n', '<br>')}</p>")
-    if not paragraphs:
-        return f"<p>{escape(text.strip())}</p>" if text.strip() else ""
-    return "".join(paragraphs)
+        buffer.write("<p>")
+        buffer.write(block.translate(_HTML_TABLE))
+        buffer.write("</p>")
+    # Blocks are only empty when the text is whitespace, which yields no HTML
+    return buffer.getvalue()
 
 
 def _ensure_html_body(body_text: str) -> str:
@@ -77,45 +167,44 @@ def _ensure_html_body(body_text: str) -> str:
     return _plain_text_to_html(body_text)
 
 
-def _apply_mail_merge(text: str, recipient_name: str, sender_name: str) -> str:
-    """Replace placeholder tokens with recipient/sender info."""
-    if not text:
-        return text
-
-    recipient_value = recipient_name or "there"
-    sender_value = sender_name or "Your team"
+class _MergeTemplate(str):
+    """A draft compiled by _compile_merge_template: placeholders are format fields, literal braces escaped."""
 
-    replacements = {
-        "[recipient name]": recipient_value,
-        "[recpient name]": recipient_value,
-        "[recipient]": recipient_value,
-        "[recipient_first_name]": recipient_value,
-        "[your name]": sender_value,
-        "[sender name]": sender_value,
-        "[from name]": sender_value,
-        "[team name]": sender_value,
-    }
 
-    lowercase_replacements = {key.lower(): value for key, value in replacements.items()}
-    pattern = re.compile("|".join(re.escape(key) for key in lowercase_replacements), re.IGNORECASE)
+def _compile_merge_template(text: str) -> str:
+    """
+    Turn mail-merge placeholders into str.format fields, once per draft.
+    
+    Literal braces are escaped first, so the result is safe to pass to format_map. A draft
+    without placeholders is returned unchanged as a plain str, which _apply_mail_merge passes through.
+    """
+    # Every placeholder contains "[", so a draft without one skips the regex entirely
+    if not text or "[" not in text:
+        return text
+    escaped = text.replace("{", "{{").replace("}", "}}")
+    compiled, count = _MERGE_PATTERN.subn(lambda match: "{" + _MERGE_TOKENS[match.group(0).lower()] + "}", escaped)
+    return _MergeTemplate(compiled) if count else text
 
-    def _replace(match: re.Match) -> str:
-        return lowercase_replacements.get(match.group(0).lower(), match.group(0))
 
-    return pattern.sub(_replace, text)
+def _apply_mail_merge(template: str, recipient_name: str, sender_name: str, html: bool = False) -> str:
+    """Fill a compiled merge template with recipient/sender info, HTML-escaped for HTML templates."""
+    # Drafts without placeholders were left uncompiled and are already final
+    if not isinstance(template, _MergeTemplate):
+        return template
+    recipient_value = recipient_name or "there"
+    sender_value = sender_name or "Your team"
+    if html:
+        recipient_value = recipient_value.translate(_HTML_TABLE)
+        sender_value = sender_value.translate(_HTML_TABLE)
+    return template.format_map({"recipient": recipient_value, "sender": sender_value})
 
 
-def _parse_agent_email_output(agent_output: str) -> Tuple[str, str]:
-    """Extract subject and body from agent output supporting JSON and text formats."""
-    default_subject = "Sales Email"
-    cleaned = agent_output.strip()
+def _parse_json_email(candidate: str) -> Tuple[str | None, str | None]:
+    """Extract subject and body from a JSON object draft; (None, None) if it isn't one."""
     subject: str | None = None
     body: str | None = None
-    candidate = _strip_code_fences(cleaned)
-
-    # Try JSON parsing first
     try:
-        data = json.loads(candidate)
+        data = orjson.loads(candidate)
         if isinstance(data, dict):
             subject = data.get("subject") or data.get("subject_line") or data.get("title")
             body = (
@@ -129,13 +218,28 @@ def _parse_agent_email_output(agent_output: str) -> Tuple[str, str]:
                 body = "\n\n".join(str(item) for item in body)
             if isinstance(body, dict):
                 body = "\n\n".join(str(value) for value in body.values())
-    except json.JSONDecodeError:
+    except ValueError:
+        # orjson.JSONDecodeError is a ValueError
         logger.debug("Agent output not JSON - falling back to heuristics")
     except Exception as json_error:
-        logger.warning(f"Error parsing agent JSON output: {json_error}")
+        logger.warning("Error parsing agent JSON output: %s", json_error)
+    return subject, body
+
+
+def _parse_agent_email_output(agent_output: str) -> Tuple[str, str]:
+    """Extract subject and body from agent output supporting JSON and text formats."""
+    default_subject = "Sales Email"
+    cleaned = agent_output.strip()
+    subject: str | None = None
+    body: str | None = None
+    candidate = _strip_code_fences(cleaned)
+
+    # Dispatch on the first character - only an object can carry subject/body, so prose skips the parser
+    if candidate.startswith("{"):
+        subject, body = _parse_json_email(candidate)
 
     if not subject:
-        subject_match = re.search(r"^subject(?:\s+line)?\s*[:\-]\s*(.+)$", cleaned, re.IGNORECASE | re.MULTILINE)
+        subject_match = _SUBJECT_RE.search(cleaned)
         if subject_match:
             subject = subject_match.group(1).strip()
             # Body is text after subject declaration
@@ -143,12 +247,12 @@ def _parse_agent_email_output(agent_output: str) -> Tuple[str, str]:
             body = after_subject or body
 
     if not body:
-        double_newline_split = cleaned.split("\n\n", 1)
-        if len(double_newline_split) == 2:
-            potential_subject_line = double_newline_split[0]
-            if potential_subject_line.lower().startswith("subject") and not subject:
-                subject = potential_subject_line.split(":", 1)[-1].strip() or subject
-                body = double_newline_split[1].strip()
+        # Only a leading "subject..." block without a separator can still supply the subject
+        if not subject and cleaned[:7].lower() == "subject":
+            first_block, separator, remainder = cleaned.partition("\n\n")
+            if separator:
+                subject = first_block.split(":", 1)[-1].strip() or subject
+                body = remainder.strip()
         if not body:
             body = cleaned
 
@@ -175,8 +279,8 @@ def _score_email(subject: str, body: str) -> float:
     """Compute a heuristic quality score for an email draft."""
     score = 0.0
     subject_length = len(subject.strip())
-    body_words = body.split()
-    word_count = len(body_words)
+    word_count = len(body.split())
+    body_lower = body.lower()
 
     if subject_length:
         score += 25
@@ -195,24 +299,85 @@ def _score_email(subject: str, body: str) -> float:
     elif paragraph_count == 2:
         score += 6
 
-    personalization_hits = sum(body.lower().count(term) for term in ("you", "your"))
+    # Every "your" also contains "you", so it counts twice - kept for score stability
+    personalization_hits = body_lower.count("you") + body_lower.count("your")
     score += min(personalization_hits * 2, 10)
 
-    if any(keyword in body.lower() for keyword in CTA_KEYWORDS):
+    if _CTA_RE.search(body_lower):
         score += 10
 
     return round(score, 2)
 
 
-async def _generate_candidate_for_agent(agent, agent_label: str, message: str) -> EmailCandidate | None:
+# Receives (agent_label, stage) as each sales agent reaches a milestone
+ProgressCallback = Callable[[str, str], None]
+
+
+def _make_progress_callback(progress: gr.Progress, agent_count: int) -> ProgressCallback:
+    """Map per-agent milestones onto a gr.Progress bar between 20% and 90%."""
+    finished = set()
+
+    def _on_stage(agent_label: str, stage: str) -> None:
+        if stage in ("scored", "failed"):
+            finished.add(agent_label)
+        fraction = 0.2 + 0.7 * len(finished) / agent_count
+        progress(fraction, desc=f"📝 {agent_label}: {stage} ({len(finished)}/{agent_count} done)")
+
+    return _on_stage
+
+
+async def _stream_agent_draft(
+    agent,
+    agent_label: str,
+    message: str,
+    progress_cb: Optional[ProgressCallback] = None
+):
+    """
+    Stream an agent run, reporting progress as soon as the subject line has been written.
+    
+    Cancelling the caller (e.g. on early exit) stops the run mid-decode rather than
+    letting the model finish a draft nobody will read.
+    """
+    result = Runner.run_streamed(agent, message)
+    head = StringIO()
+    subject_seen = False
+    try:
+        async for event in result.stream_events():
+            if subject_seen or event.type != "raw_response_event":
+                continue
+            if isinstance(event.data, ResponseTextDeltaEvent):
+                head.write(event.data.delta)
+                # The subject line is complete once a newline follows it
+                if "\n" in event.data.delta and _SUBJECT_RE.search(head.getvalue()):
+                    subject_seen = True
+                    if progress_cb:
+                        progress_cb(agent_label, "subject written")
+    except asyncio.CancelledError:
+        result.cancel()
+        raise
+    return result
+
+
+async def _generate_candidate_for_agent(
+    agent,
+    agent_label: str,
+    message: str,
+    progress_cb: Optional[ProgressCallback] = None
+) -> EmailCandidate | None:
     """Run a specific agent and return a scored email candidate."""
     try:
-        with trace(f"Generate email - {agent_label}"):
-            result = await Runner.run(agent, message)
+        async with _LLM_SEM:
+            with trace(f"Generate email - {agent_label}"):
+                result = await _stream_agent_draft(agent, agent_label, message, progress_cb)
     except Exception as run_error:
-        logger.error(f"Agent {agent_label} failed: {run_error}", exc_info=True)
+        logger.error("Agent %s failed: %s", agent_label, run_error, exc_info=True)
+        if progress_cb:
+            progress_cb(agent_label, "failed")
         return None
 
+    if progress_cb:
+        progress_cb(agent_label, "drafted")
+
     raw_output = str(result.final_output)
     subject, body = _parse_agent_email_output(raw_output)
     try:
@@ -224,10 +389,14 @@ async def _generate_candidate_for_agent(agent, agent_label: str, message: str) -
             validation_error,
             exc_info=False
         )
+        if progress_cb:
+            progress_cb(agent_label, "failed")
         return None
 
     score = _score_email(subject, body)
-    logger.info(f"{agent_label} score: {score}")
+    logger.info("%s score: %s", agent_label, score)
+    if progress_cb:
+        progress_cb(agent_label, "scored")
     return EmailCandidate(
         agent_name=agent_label,
         subject=subject,
@@ -237,24 +406,130 @@ async def _generate_candidate_for_agent(agent, agent_label: str, message: str) -
     )
 
 
-async def _generate_best_email(message: str) -> tuple[EmailCandidate, List[EmailCandidate], List[str]]:
-    """Generate drafts with all sales agents and pick the best one."""
+def _prompt_cache_key(message: str) -> str | None:
+    """
+    Key a prompt by its normalized text so case, punctuation and spacing variants share drafts.
+    
+    Returns None when caching is disabled or the prompt is time-sensitive.
+    """
+    if not CACHE_ENABLED or _TIME_SENSITIVE_RE.search(message):
+        return None
+    normalized = " ".join(_PUNCTUATION_RE.sub(" ", message.lower()).split())
+    return content_key(normalized)
+
+
+def _prompt_keywords(message: str) -> frozenset[str]:
+    """Extract the content keywords of a prompt, ignoring filler and request verbs."""
+    return frozenset(_KEYWORD_RE.findall(message.lower())) - _STOPWORDS
+
+
+def _find_plan_template(keywords: frozenset[str]) -> EmailCandidate | None:
+    """Return the cached best draft whose prompt keywords overlap the most, if similar enough."""
+    best_template, best_similarity = None, PLAN_SIMILARITY
+    now = time.monotonic()
+    for template_keywords, (stored_at, template) in _plan_templates.items():
+        # Templates expire with the prompt cache, so a prompt is regenerated by the writers
+        # after the TTL instead of being adapted from its own old draft forever
+        if now - stored_at >= PROMPT_CACHE_TTL_SECONDS:
+            continue
+        similarity = len(keywords & template_keywords) / len(keywords | template_keywords)
+        if similarity >= best_similarity:
+            best_template, best_similarity = template, similarity
+    return best_template
+
+
+async def _generate_best_email(
+    message: str,
+    use_cache: bool = True,
+    progress_cb: Optional[ProgressCallback] = None
+) -> tuple[EmailCandidate, List[EmailCandidate], List[str]]:
+    """
+    Generate drafts with all sales agents and pick the best one.
+    
+    Results are cached per normalized prompt for PROMPT_CACHE_TTL_SECONDS; pass
+    use_cache=False to force fresh drafts (the fresh result replaces the cached one).
+    """
+    cache_key = _prompt_cache_key(message)
+    if cache_key is not None and use_cache:
+        cached = _prompt_cache.get(cache_key)
+        if cached is not None:
+            stored_at, cached_result = cached
+            if time.monotonic() - stored_at < PROMPT_CACHE_TTL_SECONDS:
+                logger.info("Drafts served from prompt cache")
+                return cached_result
+
+    keywords = _prompt_keywords(message) if cache_key is not None else frozenset()
+    template = _find_plan_template(keywords) if keywords and use_cache else None
+    if template is not None:
+        adapter_prompt = (
+            f"New request:\n{message}\n\n"
+            f"Previous email:\nSubject: {template.subject}\n\n{template.body}"
+        )
+        adapted = await _generate_candidate_for_agent(
+            get_template_adapter(), "Template Adapter", adapter_prompt, progress_cb
+        )
+        if adapted is not None:
+            logger.info("Draft adapted from a similar prompt's template")
+            result = (adapted, [adapted], [])
+            _prompt_cache.put(cache_key, (time.monotonic(), result))
+            return result
+
     agent_configs = [
-        ("Professional Sales Agent", sales_agent1),
-        ("Humorous Sales Agent", sales_agent2),
-        ("Concise Sales Agent", sales_agent3)
+        (label, factory()) for label, factory in zip(_SALES_AGENT_LABELS, _SALES_AGENT_FACTORIES)
     ]
 
-    tasks = [asyncio.create_task(_generate_candidate_for_agent(agent, label, message)) for label, agent in agent_configs]
-    results = await asyncio.gather(*tasks)
+    task_labels = {
+        asyncio.create_task(_generate_candidate_for_agent(agent, label, message, progress_cb)): label
+        for label, agent in agent_configs
+    }
 
-    candidates = [candidate for candidate in results if candidate is not None]
-    failed_agents = [label for (label, _), candidate in zip(agent_configs, results) if candidate is None]
+    candidates: List[EmailCandidate] = []
+    failed_agents: List[str] = []
+    pending = set(task_labels)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                candidate = task.result()
+                if candidate is None:
+                    failed_agents.append(task_labels[task])
+                else:
+                    candidates.append(candidate)
+
+            # A draft near the top of the scoring scale will not be beaten, so stop the rest
+            if pending and EARLY_EXIT_SCORE > 0 and any(c.score >= EARLY_EXIT_SCORE for c in candidates):
+                logger.info("Draft scored at least %s - cancelling %d remaining agents", EARLY_EXIT_SCORE, len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                # Walk in config order; an agent that finished before its cancel landed keeps its draft
+                for task, label in task_labels.items():
+                    if task not in pending:
+                        continue
+                    if task.cancelled():
+                        failed_agents.append(f"{label} (cancelled - early exit)")
+                    elif task.exception() is None and task.result() is not None:
+                        candidates.append(task.result())
+                    else:
+                        failed_agents.append(label)
+                break
+    finally:
+        # Stop agents still running when this call is cancelled (timeout, UI cancel) so they
+        # don't keep generating and holding LLM slots
+        unfinished = [task for task in task_labels if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*unfinished, return_exceptions=True)
 
     if not candidates:
         raise RuntimeError("All sales agents failed to produce drafts")
 
     best_candidate = max(candidates, key=lambda candidate: candidate.score)
+    if cache_key is not None:
+        _prompt_cache.put(cache_key, (time.monotonic(), (best_candidate, candidates, failed_agents)))
+        if keywords:
+            _plan_templates.put(keywords, (time.monotonic(), best_candidate))
     return best_candidate, candidates, failed_agents
 
 
@@ -289,20 +564,21 @@ def _format_email_for_sending(candidate: EmailCandidate) -> str:
     return formatted.strip()
 
 
-async def run_sales_agent(message: str) -> str:
+async def run_sales_agent(message: str, progress_cb: Optional[ProgressCallback] = None) -> str:
     """
     Run the sales manager agent with the given message.
     
     Args:
         message: User input message
+        progress_cb: Optional callback notified as each sales agent reaches a milestone
         
     Returns:
         Agent response as string
     """
-    logger.info(f"Received user request: {message[:100]}...")
+    logger.info("Received user request: %.100s...", message)
     
     try:
-        best_candidate, candidates, failed_agents = await _generate_best_email(message)
+        best_candidate, candidates, failed_agents = await _generate_best_email(message, progress_cb=progress_cb)
         summary = _compose_generation_summary(best_candidate, candidates, failed_agents)
         logger.info(
             "Selected best candidate",
@@ -314,28 +590,37 @@ async def run_sales_agent(message: str) -> str:
         return summary
             
     except Exception as e:
-        logger.error(f"OOPS! Error during agent execution: {e}", exc_info=True)
+        logger.error("OOPS! Error during agent execution: %s", e, exc_info=True)
         return f"An error occurred: {str(e)}\n\nPlease check the logs for more details."
 
 
-async def _create_generation_package(message: str) -> tuple[str, str]:
+async def _create_generation_package(
+    message: str,
+    use_cache: bool = True,
+    progress_cb: Optional[ProgressCallback] = None
+) -> tuple[str, str]:
     """Run agents and return (summary_display, formatted_draft)."""
-    best_candidate, candidates, failed_agents = await _generate_best_email(message)
+    best_candidate, candidates, failed_agents = await _generate_best_email(
+        message, use_cache=use_cache, progress_cb=progress_cb
+    )
     summary = _compose_generation_summary(best_candidate, candidates, failed_agents)
     formatted_draft = _format_email_for_sending(best_candidate)
     return summary, formatted_draft
 
 
-async def _update_status_during_processing(message: str):
+async def _update_status_during_processing(message: str, progress: gr.Progress = gr.Progress()):
     """Generate draft, update status, and store state for approval workflow."""
-    logger.info(f"Received user request: {message[:100]}...")
+    logger.info("Received user request: %.100s...", message)
     message = (message or "").strip()
     if not message:
         warning = "⚠️ Please enter a request"
         return "", warning, "", warning, False, ""
 
     try:
-        summary, draft = await _create_generation_package(message)
+        progress(0.1, desc="📝 Sales agents writing emails...")
+        summary, draft = await _create_generation_package(
+            message, progress_cb=_make_progress_callback(progress, len(_SALES_AGENT_LABELS))
+        )
         final_status = "✅ Draft ready. Please review and approve or reject."
         send_status = "⏳ Awaiting approval. Approve to send automatically or reject to regenerate."
         return summary, final_status, message, send_status, False, draft
@@ -347,44 +632,23 @@ async def _update_status_during_processing(message: str):
         return failure_notice, failure_notice, message, failure_notice, False, ""
 
 
-async def _safe_agent_callback_with_progress(message: str):
+async def _safe_agent_callback_with_progress(message: str, progress: gr.Progress = gr.Progress()):
     """Run the agent workflow while surfacing real-time progress updates."""
-    logger.info(f"Received user request: {message[:100]}...")
+    logger.info("Received user request: %.100s...", message)
     
     if not message or message.strip() == "":
         return "", "⚠️ Please enter a request"
     
     try:
-        progress_state["status"] = "⏳ Starting..."
-        progress_state["progress"] = 10
-
-        async def _run_agent_task():
-            return await run_sales_agent(message)
-
-        task = asyncio.create_task(_run_agent_task())
-
-        steps = [
-            (20, "🛡️ Running input guardrails..."),
-            (35, "📝 Sales agent writing email..."),
-            (60, "✍️ Creating subject line..."),
-            (75, "🎨 Converting to HTML..."),
-            (90, "🛡️ Running output guardrails..."),
-        ]
-
-        for progress, status in steps:
-            if task.done():
-                break
-            progress_state["status"] = status
-            progress_state["progress"] = progress
-            await asyncio.sleep(15)
-
+        progress(0.1, desc="📝 Sales agents writing emails...")
+        progress_cb = _make_progress_callback(progress, len(_SALES_AGENT_LABELS))
         try:
-            result = await asyncio.wait_for(task, timeout=180)
+            result = await asyncio.wait_for(run_sales_agent(message, progress_cb), timeout=AGENT_TIMEOUT_SECONDS)
         except asyncio.TimeoutError:
-            task.cancel()
             logger.error("Agent execution timed out after 3 minutes")
             return "⏱️ Request timed out after 3 minutes", "❌ Timeout"
 
+        progress(1.0, desc="✅ Complete")
         return result, "✅ Complete! Email generated successfully."
 
     except Exception as e:
@@ -393,40 +657,75 @@ async def _safe_agent_callback_with_progress(message: str):
         return f"❌ {error_msg}", f"❌ Failed: {str(e)[:50]}..."
 
 
+def _clear_response_caches():
+    """Drop cached drafts, finalized emails and plan templates so the next request runs fresh."""
+    _prompt_cache.clear()
+    _finalized_cache.clear()
+    _plan_templates.clear()
+
 
 def _safe_clear_callback():
-    """Clear input, output, status boxes, and approval state."""
+    """Clear input, output, status boxes, approval state, and the cached drafts."""
     logger.info("Clear button clicked")
+    _clear_response_caches()
     return "", "", "", "", "", False, "", "No recipients uploaded.", [], ""
 
 
-def _handle_recipient_upload(uploaded_file) -> tuple[str, List[dict[str, str]]]:
+def _first_csv_value(row: List[str], indices: List[int]) -> str:
+    """Return the first non-empty stripped value among the given columns of a CSV row."""
+    for index in indices:
+        if index < len(row):
+            value = row[index].strip()
+            if value:
+                return value
+    return ""
+
+
+def _parse_recipient_csv(path: str) -> List[dict[str, str]] | None:
+    """
+    Read recipients from a CSV file; blocking, so run it off the event loop.
+    
+    Returns:
+        List of name/email records, or None when the file has no header row
+    """
+    recipients: List[dict[str, str]] = []
+    with open(path, newline="", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if not header:
+            return None
+
+        # Resolve the column positions once; later duplicates win, as with DictReader
+        positions = {(column or "").strip().lower(): index for index, column in enumerate(header)}
+        name_indices = [positions[column] for column in _NAME_COLUMNS if column in positions]
+        email_indices = [positions[column] for column in _EMAIL_COLUMNS if column in positions]
+
+        # Blank lines are skipped without being numbered
+        for idx, row in enumerate(filter(None, reader), start=1):
+            name = _first_csv_value(row, name_indices)
+            email = _first_csv_value(row, email_indices)
+
+            if not email:
+                logger.warning("Skipping row %s with missing email", idx)
+                continue
+
+            recipients.append({"name": name, "email": email})
+
+    return recipients
+
+
+async def _handle_recipient_upload(uploaded_file) -> tuple[str, List[dict[str, str]]]:
     """Parse uploaded CSV into recipient list."""
     if uploaded_file is None:
         return "⚠️ Please upload a CSV with 'name' and 'email' columns.", []
 
     try:
-        recipients: List[dict[str, str]] = []
-        with open(uploaded_file.name, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            if not reader.fieldnames:
-                return "⚠️ Uploaded CSV is missing a header row.", []
-
-            for idx, row in enumerate(reader, start=1):
-                normalized = { (key or "").strip().lower(): (value or "").strip() for key, value in row.items() }
-                name = (
-                    normalized.get("name")
-                    or normalized.get("recipient")
-                    or normalized.get("recipient name")
-                    or normalized.get("full name")
-                )
-                email = normalized.get("email") or normalized.get("email address")
-
-                if not email:
-                    logger.warning("Skipping row %s with missing email", idx)
-                    continue
-
-                recipients.append({"name": name or "", "email": email})
+        # Large files would otherwise stall every other request on the event loop
+        recipients = await asyncio.get_running_loop().run_in_executor(
+            _IO_POOL, _parse_recipient_csv, uploaded_file.name
+        )
+        if recipients is None:
+            return "⚠️ Uploaded CSV is missing a header row.", []
 
         if not recipients:
             return "⚠️ No valid recipients found (need name + email).", []
@@ -439,6 +738,18 @@ def _handle_recipient_upload(uploaded_file) -> tuple[str, List[dict[str, str]]]:
         return f"❌ Failed to read CSV: {parse_error}", []
 
 
+@functools.cache
+def _resolve_cache_target(factory):
+    """
+    Resolve how a factory's object exposes its cache, once per factory.
+    
+    Returns:
+        Tuple of (object, clear_cache callable or None, whether it has a cache attribute)
+    """
+    obj = factory()
+    return obj, getattr(obj, 'clear_cache', None), 'cache' in getattr(obj, '__dict__', {})
+
+
 def clear_cache_and_ui():
     """
     Clear LLM cache and reset UI components.
@@ -449,44 +760,57 @@ def clear_cache_and_ui():
     logger.info("Clearing model and agent caches...")
     cleared_count = 0
     
-    # Clear model caches if they have cache methods
-    models = [BASE_MODEL1, BASE_MODEL2, BASE_MODEL3]
-    for model in models:
-        try:
-            # Clear cache if the model has a cache attribute
-            if hasattr(model, 'cache'):
-                model.cache = {}
-                cleared_count += 1
-            
-            # Some models might have a clear_cache method
-            if hasattr(model, 'clear_cache'):
-                model.clear_cache()
-                cleared_count += 1
-        except Exception as e:
-            logger.warning(f"Oh No! Error clearing cache for model {model}: {e}", exc_info=True)
-    
-    # Clear agent caches
-    agents = [
-        sales_agent1, sales_agent2, sales_agent3,
-        subject_writer, html_converter, emailer_agent, guardrail_agent
-    ]
-    for agent in agents:
+    for factory in _CACHE_FACTORIES:
+        # Objects that were never built have nothing to clear
+        if not factory.cache_info().currsize:
+            continue
+        obj, clear_cache, has_cache = _resolve_cache_target(factory)
+        if clear_cache is None and not has_cache:
+            continue
         try:
-            if hasattr(agent, 'cache'):
-                agent.cache = {}
+            if has_cache:
+                obj.cache = {}
                 cleared_count += 1
-            if hasattr(agent, 'clear_cache'):
-                agent.clear_cache()
+            if clear_cache is not None:
+                clear_cache()
                 cleared_count += 1
         except Exception as e:
-            logger.warning(f"Error clearing cache for agent {agent.name}: {e}")
+            logger.warning("Oh No! Error clearing cache for %s: %s", getattr(obj, 'name', obj), e, exc_info=True)
     
-    logger.info(f"Successfully cleared {cleared_count} caches")
+    _clear_response_caches()
+    logger.info("Successfully cleared %d caches", cleared_count)
     
     # Return empty strings to clear the UI components
     return "", ""
 
 
+async def _send_to_recipient(
+    recipient: dict[str, str],
+    subject_template: str,
+    html_template: str,
+    sender_name: str
+) -> dict[str, str]:
+    """Mail-merge the compiled templates for one recipient and send, returning the send result."""
+    recipient_name = (recipient.get('name') or '').strip()
+    recipient_email = (recipient.get('email') or '').strip()
+
+    personalized_subject = _apply_mail_merge(subject_template, recipient_name, sender_name)
+    html_body = _apply_mail_merge(html_template, recipient_name, sender_name, html=True)
+
+    logger.info(
+        "Sending email",
+        extra={"subject": personalized_subject, "recipient_email": recipient_email or '[default]'}
+    )
+    async with _SEND_SEM:
+        result = await send_html_email(personalized_subject, html_body, recipient_email=recipient_email or None)
+    return {
+        "recipient": recipient_email or recipient_name or "default",
+        "status": result.get('status', 'error'),
+        "message": result.get('message'),
+        "status_code": result.get('status_code')
+    }
+
+
 async def send_approved_email(email_draft: str, recipients: List[dict[str, str]], sender_name: str) -> str:
     """
     Send an email that the user has approved.
@@ -503,25 +827,30 @@ async def send_approved_email(email_draft: str, recipients: List[dict[str, str]]
     logger.info("Processing approved email for sending...")
     
     try:
-        # Import here to avoid circular dependency
-        from email_service import send_html_email
-        
-        # First, run the Email Manager agent to polish/format the draft
-        manager_prompt = (
-            "You are the email manager. The user has approved this draft."
-            " Format it cleanly with a strong subject line and prepare it for sending."
+        # First, polish/format the draft with the tool-less formatter agent; mail is only
+        # ever sent per recipient by _send_to_recipient below
+        formatter_prompt = (
+            "The user has approved this draft."
+            " Format it cleanly with a strong subject line."
             " Return the complete email with subject and body.\n\n"
             f"Approved draft:\n{email_draft.strip()}"
         )
 
+        finalized_key = content_key(email_draft.strip())
+        finalized_output = _finalized_cache.get(finalized_key)
         try:
-            with trace("Email manager finalize draft"):
-                manager_result = await Runner.run(emailer_agent, manager_prompt)
-            finalized_output = str(manager_result.final_output)
-        except Exception as manager_error:
+            if finalized_output is None:
+                async with _LLM_SEM:
+                    with trace("Email formatter finalize draft"):
+                        formatter_result = await Runner.run(get_email_formatter(), formatter_prompt)
+                finalized_output = str(formatter_result.final_output)
+                _finalized_cache.put(finalized_key, finalized_output)
+            else:
+                logger.info("Finalized draft served from cache")
+        except Exception as formatter_error:
             logger.warning(
-                "Email manager failed to format draft, falling back to raw approval: %s",
-                manager_error,
+                "Email formatter failed to format draft, falling back to raw approval: %s",
+                formatter_error,
                 exc_info=True
             )
             finalized_output = email_draft
@@ -529,28 +858,30 @@ async def send_approved_email(email_draft: str, recipients: List[dict[str, str]]
         subject_template, body_template = _parse_agent_email_output(finalized_output)
         subject_template, body_template = _validate_email_content(subject_template, body_template)
 
+        # Placeholders are resolved and the body converted to HTML once here; placeholders
+        # survive the conversion untouched, so each recipient only fills in the fields
+        subject_template = _compile_merge_template(subject_template)
+        html_template = _compile_merge_template(_ensure_html_body(body_template))
+
         recipients_to_use = recipients or []
+        outcomes = await asyncio.gather(
+            *[
+                _send_to_recipient(recipient, subject_template, html_template, sender_name)
+                for recipient in recipients_to_use
+            ],
+            return_exceptions=True
+        )
         send_results: List[dict[str, str]] = []
-
-        for recipient in recipients_to_use:
-            recipient_name = (recipient.get('name') or '').strip()
-            recipient_email = (recipient.get('email') or '').strip()
-
-            personalized_subject = _apply_mail_merge(subject_template, recipient_name, sender_name)
-            personalized_body = _apply_mail_merge(body_template, recipient_name, sender_name)
-            html_body = _ensure_html_body(personalized_body)
-
-            logger.info(
-                "Sending email",
-                extra={"subject": personalized_subject, "recipient_email": recipient_email or '[default]'}
-            )
-            result = await send_html_email(personalized_subject, html_body, recipient_email=recipient_email or None)
-            send_results.append({
-                "recipient": recipient_email or recipient_name or "default",
-                "status": result.get('status', 'error'),
-                "message": result.get('message'),
-                "status_code": result.get('status_code')
-            })
+        for recipient, outcome in zip(recipients_to_use, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error("Send failed for %s: %s", recipient.get('email') or 'default recipient', outcome)
+                outcome = {
+                    "recipient": (recipient.get('email') or recipient.get('name') or 'default').strip(),
+                    "status": "error",
+                    "message": str(outcome),
+                    "status_code": None
+                }
+            send_results.append(outcome)
 
         success_count = sum(1 for res in send_results if res["status"] == "success")
         failure_details = [res for res in send_results if res["status"] != "success"]
@@ -615,7 +946,8 @@ async def _reject_and_regenerate(prompt: str):
         return warning, warning, "", warning, False, ""
 
     try:
-        summary, draft = await _create_generation_package(prompt)
+        # A rejected draft must not come back from the cache
+        summary, draft = await _create_generation_package(prompt, use_cache=False)
         status = "✅ Generated a new draft after rejection."
         send_status = "⏳ Awaiting approval for the new draft."
         return summary, status, prompt, send_status, False, draft
@@ -769,7 +1101,14 @@ def launch_interface():
     return interface
 
 
+@asynccontextmanager
+async def _app_lifespan(app):
+    """Server lifespan: close pooled SendGrid connections on the server's loop at shutdown."""
+    yield
+    await close_sendgrid_client()
+
+
 if __name__ == "__main__":
     logger.info("Starting Sales Agent application")
     interface = launch_interface()
-    interface.launch()
+    interface.launch(app_kwargs={"lifespan": _app_lifespan})
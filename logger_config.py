@@ -5,17 +5,22 @@ Provides both console and rotating file logging with structured JSON formart.
 Author: Ben Walker (BenRWalker@icloud.com)
 """
 
+import atexit
+import copy
+import functools
 import logging
 import logging.handlers
 import os
+import queue
 import sys
-from datetime import datetime
+import threading
+import time
 from pathlib import Path
-from pythonjsonlogger import jsonlogger
+import orjson
 
-# Create logs directory if it doesn't exist
+# Logs directory, created by the first setup_logger call that logs to file
 LOGS_DIR = Path("logs")
-LOGS_DIR.mkdir(exist_ok=True)
+_LOGS_DIR_READY = False
 
 # Log file paths
 MAIN_LOG_FILE = LOGS_DIR / "sales_agent.log"
@@ -27,22 +32,63 @@ GUARDRAIL_LOG_FILE = LOGS_DIR / "guardrails.log"
 MAX_BYTES = 10 * 1024 * 1024 # 10MB
 BACKUP_COUNT = 5
 
-class CustomJsonFormatter(jsonlogger.JsonFormatter):
+# None of the formatters use thread or process fields, so skip collecting them per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# The file formatters include the caller's file, function and line, which costs a stack
+# walk per record; set LOG_CALLER_INFO=false to skip it (those fields then read "(unknown file)"/0)
+LOG_CALLER_INFO = os.environ.get('LOG_CALLER_INFO', 'true').lower() not in ('0', 'false', 'no')
+if not LOG_CALLER_INFO:
+    logging._srcfile = None
+
+# (second, formatted prefix) of the last ISO timestamp, reused for every record in that
+# second; kept as one tuple so threads never see a second paired with another's prefix
+_cached_ts = (-1, "")
+
+
+def _fast_iso_ts(created: float) -> str:
+    """Return a UNIX timestamp (e.g. record.created) as UTC ISO 8601 with microseconds and a 'Z' suffix."""
+    global _cached_ts
+    second = int(created)
+    cached_second, prefix = _cached_ts
+    if second != cached_second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+        _cached_ts = (second, prefix)
+    return f"{prefix}.{int((created - second) * 1e6):06d}Z"
+
+
+# Standard LogRecord attributes; anything else on a record came from `extra=` and is logged as a field
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class CustomJsonFormatter(logging.Formatter):
     """
-    Custom JSON formatter that adds additional context to logs
+    JSON formatter that adds additional context to logs, building each record as a dict
+    and serializing it with a single orjson call
     """
-    def add_fields(self, log_record, record, message_dict):
-        super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
+    def format(self, record):
+        log_record = {
+            # Event time from the record; formatting runs later on the listener thread
+            'timestamp': _fast_iso_ts(record.created),
+            'level': record.levelname,
+            'name': record.name,
+            'message': record.getMessage(),
+        }
         
-        # Add timestamp in ISO format
-        if not log_record.get('timestamp'):
-            log_record['timestamp'] = datetime.utcnow().isoformat() + 'Z'
+        # Fields passed through `extra=`
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                log_record[key] = value
         
-        # Add level name
-        if log_record.get('level'):
-            log_record['level'] = log_record['level'].upper()
-        else:
-            log_record['level'] = record.levelname
+        # Traceback, already rendered to exc_text when the record came through the queue
+        if record.exc_info:
+            log_record['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_record['exc_info'] = record.exc_text
+        if record.stack_info:
+            log_record['stack_info'] = self.formatStack(record.stack_info)
         
         # Add application context
         log_record['application'] = 'sales_agent'
@@ -51,6 +97,10 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
         log_record['module'] = record.module
         log_record['function'] = record.funcName
         log_record['line_number'] = record.lineno
+        
+        # Values orjson can't encode natively fall back to str()
+        return orjson.dumps(log_record, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
 
 class ColoredConsoleFormatter(logging.Formatter):
     """
@@ -66,14 +116,235 @@ class ColoredConsoleFormatter(logging.Formatter):
         'RESET': '\033[0m'        # Reset
     }
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Colored level names are built once rather than on every record
+        reset = self.COLORS['RESET']
+        self._colored = {
+            level: f"{color}{level}{reset}"
+            for level, color in self.COLORS.items() if level != 'RESET'
+        }
+    
     def format(self, record):
-        # Add color to level name
+        # Add color to level name, restoring it so the file handlers see the plain name
         levelname = record.levelname
-        if levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[levelname]}{levelname}{self.COLORS['RESET']}"
-        
-        return super().format(record)
+        record.levelname = self._colored.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
+    
+# Formatters hold no per-logger state, so every handler shares one instance of each
+@functools.cache
+def _console_formatter() -> ColoredConsoleFormatter:
+    return ColoredConsoleFormatter(
+        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+
+@functools.cache
+def _json_formatter() -> CustomJsonFormatter:
+    return CustomJsonFormatter()
+
+
+@functools.cache
+def _text_formatter() -> logging.Formatter:
+    return logging.Formatter(
+        fmt='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that hands records to the listener thread with their message merged
+    but the traceback kept apart, so the file formatters can still place it themselves.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _text_formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _RoutingHandler(logging.Handler):
+    """
+    Listener-side handler that forwards each record to its logger's file handlers,
+    applying that route's level and formatter
+    """
+    def handle(self, record):
+        for handler, level, formatter in _routes_for(record.name):
+            if record.levelno >= level:
+                handler.handle_formatted(record, formatter)
+        return True
+
+
+# File writes happen on one listener thread; loggers only enqueue records
+_LOG_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+_QUEUE_HANDLER = _DeferredQueueHandler(_LOG_QUEUE)
+# Logger name -> (file handler, minimum level, formatter) for each file its records are written to
+_FILE_ROUTES: dict[str, list[tuple[logging.Handler, int, logging.Formatter]]] = {}
+
+def _routes_for(name: str) -> list:
+    """
+    Return the file routes for a logger, walking up the dotted name so records from child
+    loggers (propagated to a configured parent) go to the parent's files
+    """
+    routes = _FILE_ROUTES.get(name)
+    while routes is None and '.' in name:
+        name = name.rpartition('.')[0]
+        routes = _FILE_ROUTES.get(name)
+    return routes or []
+
+
+# Records are buffered per file handler and written in batches; ERROR and above
+# flush immediately, and the flusher thread bounds how stale a buffer can get
+BUFFER_CAPACITY = 512
+MAX_PENDING_LINES = 8 * BUFFER_CAPACITY  # Oldest lines are dropped past this while writes keep failing
+FLUSH_INTERVAL_SECONDS = 1.0
+_BATCH_HANDLERS: list[logging.Handler] = []
+_FLUSH_STOP = threading.Event()
+
+
+class _BatchingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotating file handler that formats records into a pending batch and writes each batch
+    with a single write() and flush, checking for rollover once per batch instead of per record
+    """
+    def __init__(self, filename, capacity: int = BUFFER_CAPACITY, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.capacity = capacity
+        self._pending: list[str] = []
+    
+    def emit(self, record):
+        self._add(record, self.formatter or logging.Formatter())
     
+    def handle_formatted(self, record, formatter: logging.Formatter):
+        """Handle a record using the given formatter, so loggers with different formats can share the file"""
+        if self.filter(record):
+            self.acquire()
+            try:
+                self._add(record, formatter)
+            finally:
+                self.release()
+    
+    def _add(self, record, formatter: logging.Formatter):
+        try:
+            self._pending.append(formatter.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._pending) >= self.capacity or record.levelno >= logging.ERROR:
+            self.flush()
+    
+    def flush(self):
+        self.acquire()
+        try:
+            if self._pending:
+                data = ''.join(self._pending)
+                try:
+                    if self.stream is None:
+                        if self.mode != 'w' or not self._closed:
+                            self.stream = self._open()
+                    if self.stream is not None:
+                        if self.maxBytes > 0:
+                            self.stream.seek(0, 2)  # due to non-posix-compliant Windows feature
+                            position = self.stream.tell()
+                            if position and position + len(data) >= self.maxBytes:
+                                self.doRollover()
+                                # With delay=True the rollover leaves the new file unopened
+                                if self.stream is None:
+                                    self.stream = self._open()
+                        self.stream.write(data)
+                        self.stream.flush()
+                except Exception:
+                    # Report like a stock handler would, without killing the listener or flusher
+                    # thread; the batch is kept for the next flush, capped so a dead disk can't
+                    # grow it without bound
+                    self.handleError(logging.makeLogRecord({
+                        'msg': "Failed to write %d batched log lines to %s",
+                        'args': (len(self._pending), self.baseFilename),
+                    }))
+                    del self._pending[:-MAX_PENDING_LINES]
+                else:
+                    self._pending.clear()
+        finally:
+            self.release()
+    
+    def close(self):
+        self.flush()
+        super().close()
+
+
+def _flush_buffers_periodically():
+    """Flush every batching handler once per interval until shutdown"""
+    while not _FLUSH_STOP.wait(FLUSH_INTERVAL_SECONDS):
+        for handler in list(_BATCH_HANDLERS):
+            handler.flush()
+
+
+def _shutdown_logging(listener: logging.handlers.QueueListener):
+    """Drain the queue into the handlers first, then write out and close their batches"""
+    listener.stop()
+    _FLUSH_STOP.set()
+    for handler in _BATCH_HANDLERS:
+        handler.close()
+
+
+@functools.cache
+def _start_listener() -> logging.handlers.QueueListener:
+    """Start the single background listener and buffer flusher on first use; both are stopped at exit"""
+    listener = logging.handlers.QueueListener(_LOG_QUEUE, _RoutingHandler())
+    listener.start()
+    threading.Thread(target=_flush_buffers_periodically, name="log-flusher", daemon=True).start()
+    atexit.register(_shutdown_logging, listener)
+    return listener
+
+
+# Logger names containing any of these keywords are routed to the agent log
+_AGENT_KEYWORDS = frozenset(('agent', 'sales', 'email_service', 'interface'))
+# Logger name -> log file, decided once per name
+_ROUTE_CACHE: dict[str, Path] = {}
+
+
+def _log_file_for(name: str) -> Path:
+    """Determine the log file for a logger based on its name"""
+    log_file = _ROUTE_CACHE.get(name)
+    if log_file is None:
+        lname = name.lower()
+        if 'guardrail' in lname:
+            log_file = GUARDRAIL_LOG_FILE
+        elif any(keyword in lname for keyword in _AGENT_KEYWORDS):
+            log_file = AGENT_LOG_FILE
+        else:
+            log_file = MAIN_LOG_FILE
+        _ROUTE_CACHE[name] = log_file
+    return log_file
+
+
+@functools.cache
+def _file_handler(log_file: Path) -> _BatchingRotatingFileHandler:
+    """
+    Rotating file handler shared by every logger writing to the given file, so each log file
+    is opened and rotated by a single handler. Levels and formats are applied per record by
+    the routing handler, which lets JSON and text loggers share a file.
+    """
+    handler = _BatchingRotatingFileHandler(
+        log_file,
+        maxBytes=MAX_BYTES,
+        backupCount=BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True  # Open the file on the first write, not when the logger is set up
+    )
+    _BATCH_HANDLERS.append(handler)
+    return handler
+
+
 def setup_logger(
     name: str,
     level: int = logging.INFO,
@@ -105,70 +376,24 @@ def setup_logger(
     if log_to_console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(level)
-        
-        console_format = ColoredConsoleFormatter(
-            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        console_handler.setFormatter(console_format)
+        console_handler.setFormatter(_console_formatter())
         logger.addHandler(console_handler)
     
-    # File handler with rotation
+    # File handlers (main file by logger name, plus the error log) shared across loggers
     if log_to_file:
-        # Determine log file based on logger name
-        # FIXED: Better routing logic for agent-related logs
-        if 'guardrail' in name.lower():
-            log_file = GUARDRAIL_LOG_FILE
-        elif any(keyword in name.lower() for keyword in ['agent', 'sales', 'email_service', 'interface']):
-            log_file = AGENT_LOG_FILE
-        else:
-            log_file = MAIN_LOG_FILE
-        
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_file,
-            maxBytes=MAX_BYTES,
-            backupCount=BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(level)
-        
-        if use_json:
-            # JSON formatter for machine-readable logs
-            json_format = CustomJsonFormatter(
-                fmt='%(timestamp)s %(level)s %(name)s %(message)s'
-            )
-            file_handler.setFormatter(json_format)
-        else:
-            # Standard text formatter
-            text_format = logging.Formatter(
-                fmt='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            file_handler.setFormatter(text_format)
-        
-        logger.addHandler(file_handler)
-    
-    # Separate error file handler (always enabled if file logging is on)
-    if log_to_file:
-        error_handler = logging.handlers.RotatingFileHandler(
-            ERROR_LOG_FILE,
-            maxBytes=MAX_BYTES,
-            backupCount=BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        error_handler.setLevel(logging.ERROR)
-        
-        if use_json:
-            error_handler.setFormatter(CustomJsonFormatter(
-                fmt='%(timestamp)s %(level)s %(name)s %(message)s'
-            ))
-        else:
-            error_handler.setFormatter(logging.Formatter(
-                fmt='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            ))
-        
-        logger.addHandler(error_handler)
+        global _LOGS_DIR_READY
+        if not _LOGS_DIR_READY:
+            LOGS_DIR.mkdir(exist_ok=True)
+            _LOGS_DIR_READY = True
+        # JSON formatter for machine-readable logs, otherwise the standard text formatter
+        formatter = _json_formatter() if use_json else _text_formatter()
+        _FILE_ROUTES[name] = [
+            (_file_handler(_log_file_for(name)), logging.NOTSET, formatter),
+            (_file_handler(ERROR_LOG_FILE), logging.ERROR, formatter),
+        ]
+        # Disk writes run on the listener thread, off the caller's (and event loop's) path
+        _start_listener()
+        logger.addHandler(_QUEUE_HANDLER)
     
     # Don't propagate to root logger
     logger.propagate = False
@@ -187,9 +412,18 @@ def get_log_level_from_env() -> int:
     return getattr(logging, level_name, logging.INFO)
 
 
-# Create default application logger
-app_logger = setup_logger(
-    'sales_agent',
-    level=get_log_level_from_env(),
-    use_json=False
-)
\ No newline at end of file
+@functools.cache
+def get_app_logger() -> logging.Logger:
+    """Return the default application logger, set up (and the logs directory created) on first use"""
+    return setup_logger(
+        'sales_agent',
+        level=get_log_level_from_env(),
+        use_json=False
+    )
+
+
+def __getattr__(name: str):
+    """Keep `from logger_config import app_logger` working without setting it up at import."""
+    if name == 'app_logger':
+        return get_app_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
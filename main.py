@@ -6,48 +6,60 @@ Author: Ben Walker (BenRWalker@icloud.com)
 import asyncio
 from config import setup_env
 from agents import Runner, trace
-from sales_manager import careful_sales_manager
+from sales_manager import get_careful_sales_manager
+from email_service import close_sendgrid_client
 from logger_config import setup_logger
 
+try:
+    import uvloop
+except ImportError:  # Optional faster event loop - the stdlib asyncio loop is used without it
+    uvloop = None
+
 # Set up logger for main module
 logger = setup_logger(__name__)
 
+_BAR = "=" * 60
+
+
 async def main():
     """
     Main execution function
     """
-    logger.info("=" * 60)
+    logger.info(_BAR)
     logger.info("Starting Sales Agent Application")
-    logger.info("=" * 60)
+    logger.info(_BAR)
     
     setup_env()
     
     # Example message
     message = "Send out a cold sales email address to Dear CEO from Alice"
-    logger.info(f"Processing message: {message}")
+    logger.info("Processing message: %s", message)
     
     try:
         # Run the Sales Manager Agent
         with trace("Protect Automated SDR"):
             logger.debug("Initializing agent runner")
-            result = await Runner.run(careful_sales_manager, message)
+            result = await Runner.run(get_careful_sales_manager(), message)
             
             logger.info("Agent execution completed successfully")
-            logger.debug(f"Final output type: {type(result.final_output)}")
+            logger.debug("Final output type: %s", type(result.final_output))
             
             return result
     except Exception as e:
-        logger.error(f"Error in main execution: {e}", exc_info=True)
+        logger.error("Error in main execution: %s", e, exc_info=True)
         raise
+    finally:
+        # Close pooled SendGrid connections on this loop, before asyncio.run tears it down
+        await close_sendgrid_client()
 
 if __name__ == "__main__":
     try:
-        # Run the async function
-        result = asyncio.run(main())
+        # Run the async function (on uvloop when installed)
+        result = uvloop.run(main()) if uvloop is not None else asyncio.run(main())
         print("Final Output:", result.final_output)
         logger.info("Application finished successfully")
     except KeyboardInterrupt:
         logger.warning("Application interrupted by user")
     except Exception as e:
-        logger.critical(f"Application crashed: {e}", exc_info=True)
+        logger.critical("Application crashed: %s", e, exc_info=True)
         raise
\ No newline at end of file
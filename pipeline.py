@@ -0,0 +1,143 @@
+"""
+End-to-end sales email pipeline exposed to the Sales Manager as a single tool.
+
+Author: Ben Walker (BenRWalker@icloud.com)
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, List, Literal, Optional
+
+from agents import Runner, function_tool
+from agent_setup import get_sales_agent1, get_sales_agent2, get_sales_agent3, prepare_and_send
+from email_logger import log_bulk_send_summary
+from guardrails import evaluate_input_guardrail, evaluate_output_guardrail
+from logger_config import setup_logger
+
+# Set up logger for this module
+logger = setup_logger('sales_pipeline')
+
+SalesStyle = Literal["professional", "humorous", "concise"]
+
+DEFAULT_STYLE: SalesStyle = "professional"
+# Keyword cues for picking a writing style without an LLM turn
+STYLE_KEYWORDS = {
+    "professional": frozenset({"professional", "formal", "enterprise", "b2b", "corporate", "serious"}),
+    "humorous": frozenset({"witty", "funny", "humor", "humour", "humorous", "playful", "fun", "joke", "quirky", "cheeky"}),
+    "concise": frozenset({"concise", "brief", "short", "busy", "quick", "succinct", "executive", "executives"})
+}
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Pipelines in flight at once during bulk sends; a batching server (vLLM) serves these together
+BULK_CONCURRENCY = 32
+
+# Writing style -> sales agent factory
+STYLE_AGENTS = {
+    "professional": get_sales_agent1,
+    "humorous": get_sales_agent2,
+    "concise": get_sales_agent3
+}
+
+
+def pick_style(brief: str) -> Optional[SalesStyle]:
+    """
+    Classify the brief into a writing style from keyword cues.
+    
+    Returns None when no style clearly wins, leaving the choice to the caller.
+    """
+    words = set(_WORD_RE.findall(brief.lower()))
+    scores = {style: len(words & keywords) for style, keywords in STYLE_KEYWORDS.items()}
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best_style, best_score), (_, runner_up_score) = ranked[0], ranked[1]
+    if best_score == 0 or best_score == runner_up_score:
+        return None
+    return best_style
+
+
+async def send_sales_email(
+    brief: str,
+    recipient_email: Optional[str] = None,
+    style: Optional[SalesStyle] = None
+) -> Dict[str, Any]:
+    """
+    Write and send a cold sales email in one step.
+    
+    Runs the input guardrail on the brief, drafts the email with a writer
+    picked from the brief, checks the draft with the output guardrail, then
+    generates the subject line and HTML body in parallel and sends it.
+    
+    Args:
+        brief: What the email should say (company, product, sender, audience)
+        recipient_email: Optional recipient address; defaults to TO_EMAIL
+        style: Only set when the user explicitly asks for professional, humorous or concise
+    """
+    if not style:
+        style = pick_style(brief) or DEFAULT_STYLE
+    logger.info("Running sales pipeline with style: %s", style)
+
+    agent_factory = STYLE_AGENTS.get(style)
+    if agent_factory is None:
+        return {"status": "error", "message": f"Unknown style '{style}'"}
+
+    # Guardrails run in code - no LLM turn needed to decide whether to proceed
+    input_verdict = evaluate_input_guardrail(brief)
+    if input_verdict.tripwire_triggered:
+        reason = input_verdict.output_info.get("reason", "Input guardrail triggered")
+        logger.warning("Sales pipeline stopped by input guardrail: %s", reason)
+        return {"status": "blocked", "message": reason}
+
+    draft_result = await Runner.run(agent_factory(), brief)
+    draft = str(draft_result.final_output).strip()
+
+    output_verdict = evaluate_output_guardrail(draft)
+    if output_verdict.tripwire_triggered:
+        reason = output_verdict.output_info.get("reason", "Output guardrail triggered")
+        logger.warning("Sales pipeline stopped by output guardrail: %s", reason)
+        return {"status": "blocked", "message": reason}
+
+    result = await prepare_and_send(draft, recipient_email=recipient_email)
+    result["style"] = style
+    return result
+
+
+# Tool wrapper for agent usage
+send_sales_email_tool = function_tool(send_sales_email)
+
+
+async def send_bulk(prospects: List[Dict[str, str]], concurrency: int = BULK_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Run the sales pipeline for many prospects concurrently.
+    
+    Args:
+        prospects: Records with a 'brief', an optional 'email' and an optional 'style'
+        concurrency: Maximum number of pipelines in flight at once
+        
+    Returns:
+        One result dict per prospect, in input order
+    """
+    if not prospects:
+        return []
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run_one(prospect: Dict[str, str]) -> Dict[str, Any]:
+        async with semaphore:
+            return await send_sales_email(
+                prospect.get("brief", ""),
+                recipient_email=prospect.get("email") or None,
+                style=prospect.get("style") or None
+            )
+
+    logger.info("Starting bulk send for %d prospects (concurrency %d)", len(prospects), concurrency)
+    outcomes = await asyncio.gather(*(_run_one(prospect) for prospect in prospects), return_exceptions=True)
+
+    results: List[Dict[str, Any]] = []
+    for prospect, outcome in zip(prospects, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error("Pipeline failed for %s: %s", prospect.get('email') or 'default recipient', outcome)
+            outcome = {"status": "error", "message": str(outcome)}
+        results.append(outcome)
+
+    successful = sum(1 for result in results if result.get("status") == "success")
+    log_bulk_send_summary(len(results), successful, len(results) - successful)
+    return results
@@ -4,28 +4,39 @@ Main Sales manager agent that coordinates the team.
 Author: Ben Walker (BenRWalker@icloud.com)
 """
 
+import functools
+
 from agents import Agent
-from prompts import SALES_MANAGER_INSTRUCTIONS
-from agent_setup import BASE_MODEL2, sales_tools
+from prompts import get_prompt
+from agent_setup import get_base_model2, sales_tools
+from config import MODEL2_NAME
 from guardrails import comprehensive_input_guardrail, comprehensive_output_guardrail
+from pipeline import send_sales_email_tool
 from logger_config import setup_logger
 
 # Set up logger for this module
 logger = setup_logger('sales_manager')
 
-logger.info("Creating Sales Manager Agent")
-# Create the main sales manager agent with enhanced guardrails
-careful_sales_manager = Agent(
-    name="Sales Manager",
-    instructions=SALES_MANAGER_INSTRUCTIONS,
-    tools=sales_tools,
-    model=BASE_MODEL2,
-    input_guardrails=[comprehensive_input_guardrail],
-    output_guardrails=[comprehensive_output_guardrail]
-)
-logger.info("✓ Sales Manager agent created with:")
-logger.info(f"  - {len(sales_tools)} sales agent tools")
-logger.info(f"  - 0 handoffs (direct response)")
-logger.info(f"  - Input guardrails: enabled")
-logger.info(f"  - Output guardrails: enabled")
-logger.info(f"  - Model: llama3.2:1b")
+
+@functools.cache
+def get_careful_sales_manager() -> Agent:
+    """Return the main sales manager agent with enhanced guardrails, built on first use."""
+    logger.info("Creating Sales Manager Agent")
+    agent = Agent(
+        name="Sales Manager",
+        instructions=get_prompt("sales_manager_instructions"),
+        tools=[*sales_tools, send_sales_email_tool],
+        model=get_base_model2(),
+        input_guardrails=[comprehensive_input_guardrail],
+        output_guardrails=[comprehensive_output_guardrail]
+    )
+    logger.info(
+        "✓ Sales Manager agent created with:\n"
+        "  - %d sales agent tools + send_sales_email pipeline tool\n"
+        "  - 0 handoffs (direct response)\n"
+        "  - Input guardrails: enabled\n"
+        "  - Output guardrails: enabled\n"
+        "  - Model: %s",
+        len(sales_tools), MODEL2_NAME
+    )
+    return agent
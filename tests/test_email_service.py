@@ -0,0 +1,34 @@
+"""
+Tests for the shared SendGrid client lifecycle.
+Run with: python -m unittest discover tests
+"""
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import email_service
+
+
+class SendgridClientTests(unittest.TestCase):
+    def test_close_on_the_loop_that_used_the_client(self):
+        async def use_and_close():
+            client = email_service._get_sendgrid_client()
+            await email_service.close_sendgrid_client()
+            return client
+
+        client = asyncio.run(use_and_close())
+        self.assertTrue(client.is_closed)
+        self.assertEqual(email_service._get_sendgrid_client.cache_info().currsize, 0)
+
+    def test_close_without_client_is_a_no_op(self):
+        email_service._get_sendgrid_client.cache_clear()
+        asyncio.run(email_service.close_sendgrid_client())
+        self.assertEqual(email_service._get_sendgrid_client.cache_info().currsize, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests for the response caches behind the Gradio interface.
+Run with: python -m unittest discover tests
+"""
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import interface
+
+
+def _candidate(score: float = 50.0) -> interface.EmailCandidate:
+    return interface.EmailCandidate(
+        agent_name="Professional Sales Agent",
+        subject="Quick question",
+        body="Hi there,\n\nCould we book a call?",
+        raw_output="",
+        score=score,
+    )
+
+
+class ClearButtonTests(unittest.TestCase):
+    def tearDown(self):
+        interface._clear_response_caches()
+
+    def test_clear_empties_response_caches(self):
+        candidate = _candidate()
+        interface._prompt_cache.put("key", (0.0, (candidate, [candidate], [])))
+        interface._finalized_cache.put("key", "Subject: Quick question\n\nHi there")
+        interface._plan_templates.put(frozenset({"cold", "email"}), (0.0, candidate))
+
+        interface._safe_clear_callback()
+
+        self.assertEqual(len(interface._prompt_cache), 0)
+        self.assertEqual(len(interface._finalized_cache), 0)
+        self.assertEqual(len(interface._plan_templates), 0)
+
+
+    def test_clear_forces_the_formatter_to_run_again(self):
+        formatter_calls = []
+
+        async def fake_run(agent, prompt):
+            formatter_calls.append(prompt)
+            return SimpleNamespace(final_output="Subject: Quick question\n\nHi [recipient name],\n\nCould we book a call?")
+
+        async def fake_send(subject, html_body, recipient_email=None):
+            return {"status": "success"}
+
+        recipients = [{"name": "Ada", "email": "ada@example.com"}]
+        with mock.patch.object(interface.Runner, "run", fake_run), \
+                mock.patch.object(interface, "send_html_email", fake_send):
+            asyncio.run(interface.send_approved_email("Subject: Hi\n\nDraft body", recipients, "Team"))
+            asyncio.run(interface.send_approved_email("Subject: Hi\n\nDraft body", recipients, "Team"))
+            self.assertEqual(len(formatter_calls), 1)
+
+            interface._safe_clear_callback()
+            asyncio.run(interface.send_approved_email("Subject: Hi\n\nDraft body", recipients, "Team"))
+            self.assertEqual(len(formatter_calls), 2)
+
+
+
+class PlanTemplateTests(unittest.TestCase):
+    KEYWORDS = frozenset({"cloud", "backup", "startups"})
+
+    def tearDown(self):
+        interface._clear_response_caches()
+
+    def test_fresh_template_matches(self):
+        candidate = _candidate()
+        interface._plan_templates.put(self.KEYWORDS, (interface.time.monotonic(), candidate))
+        self.assertIs(interface._find_plan_template(self.KEYWORDS), candidate)
+
+    def test_expired_template_is_skipped(self):
+        stored_at = interface.time.monotonic() - interface.PROMPT_CACHE_TTL_SECONDS - 1
+        interface._plan_templates.put(self.KEYWORDS, (stored_at, _candidate()))
+        self.assertIsNone(interface._find_plan_template(self.KEYWORDS))
+
+
+
+class EarlyExitTests(unittest.TestCase):
+    def tearDown(self):
+        interface._clear_response_caches()
+
+    def test_draft_finished_during_cancel_is_kept(self):
+        async def fake_candidate(agent, label, message, progress_cb):
+            if label == "Professional Sales Agent":
+                return _candidate(score=99.0)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # Finished its draft as the cancel arrived
+                if label == "Humorous Sales Agent":
+                    return _candidate(score=40.0)
+                raise
+            return None
+
+        with mock.patch.object(interface, "_generate_candidate_for_agent", fake_candidate), \
+                mock.patch.object(interface, "EARLY_EXIT_SCORE", 85.0):
+            best, candidates, failed = asyncio.run(
+                interface._generate_best_email("write a cold email about cloud backup", use_cache=False)
+            )
+
+        self.assertEqual(best.score, 99.0)
+        self.assertEqual(len(candidates), 2)
+        self.assertEqual(failed, ["Concise Sales Agent (cancelled - early exit)"])
+
+
+if __name__ == '__main__':
+    unittest.main()
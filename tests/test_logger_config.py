@@ -0,0 +1,123 @@
+"""
+Tests for the batching file handlers in logger_config.
+Run with: python -m unittest discover tests
+"""
+
+import json
+import logging
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import logger_config
+
+
+class BatchingRotatingFileHandlerTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.log_file = Path(self._tmp.name) / "test.log"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _handler(self, **kwargs):
+        handler = logger_config._BatchingRotatingFileHandler(
+            self.log_file, encoding='utf-8', delay=True, **kwargs
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        # Write failures are swallowed by handleError, so surface them as test failures
+        handler.handleError = lambda record: self.fail(record.getMessage())
+        self.addCleanup(handler.close)
+        return handler
+
+    @staticmethod
+    def _record(message, level=logging.INFO):
+        return logging.makeLogRecord({'msg': message, 'levelno': level, 'levelname': logging.getLevelName(level)})
+
+    def test_rollover_with_delay_keeps_writing(self):
+        handler = self._handler(capacity=5, maxBytes=200, backupCount=2)
+        lines = [f"line {i:03d} " + "x" * 20 for i in range(60)]
+        for line in lines:
+            handler.handle(self._record(line))
+        handler.flush()
+
+        self.assertTrue(Path(f"{self.log_file}.1").exists())
+        self.assertEqual(handler._pending, [])
+        written = self.log_file.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(written[-1], lines[-1])
+
+    def test_error_flushes_immediately(self):
+        handler = self._handler(capacity=100)
+        handler.handle(self._record("info line"))
+        self.assertFalse(self.log_file.exists())
+
+        handler.handle(self._record("error line", logging.ERROR))
+        self.assertEqual(self.log_file.read_text(encoding='utf-8'), "info line\nerror line\n")
+
+
+
+class SharedFileHandlerTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.log_file = Path(self._tmp.name) / "shared.log"
+        self.handler = logger_config._file_handler(self.log_file)
+        self.addCleanup(self.handler.close)
+
+    def tearDown(self):
+        for name in ('test.text', 'test.json', 'test.parent'):
+            logger_config._FILE_ROUTES.pop(name, None)
+        self._tmp.cleanup()
+
+    def test_one_handler_per_path(self):
+        self.assertIs(logger_config._file_handler(self.log_file), self.handler)
+
+    def test_routes_apply_their_own_level_and_format(self):
+        logger_config._FILE_ROUTES['test.text'] = [
+            (self.handler, logging.NOTSET, logging.Formatter('text %(message)s')),
+        ]
+        logger_config._FILE_ROUTES['test.json'] = [
+            (self.handler, logging.ERROR, logger_config._json_formatter()),
+        ]
+        router = logger_config._RoutingHandler()
+        for name, level in (('test.text', logging.INFO), ('test.json', logging.INFO), ('test.json', logging.ERROR)):
+            router.handle(logging.makeLogRecord({
+                'name': name, 'msg': 'hello', 'levelno': level, 'levelname': logging.getLevelName(level),
+            }))
+        self.handler.flush()
+
+        lines = self.log_file.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0], "text hello")
+        self.assertTrue(lines[1].startswith('{"timestamp"'))
+        self.assertIn('"level":"ERROR"', lines[1])
+
+
+    def test_child_logger_uses_parent_route(self):
+        logger_config._FILE_ROUTES['test.parent'] = [
+            (self.handler, logging.NOTSET, logging.Formatter('%(name)s %(message)s')),
+        ]
+        logger_config._RoutingHandler().handle(logging.makeLogRecord({
+            'name': 'test.parent.child.grandchild', 'msg': 'hello', 'levelno': logging.INFO,
+        }))
+        self.handler.flush()
+
+        self.assertEqual(self.log_file.read_text(encoding='utf-8'), "test.parent.child.grandchild hello\n")
+
+    def test_unconfigured_logger_has_no_route(self):
+        self.assertEqual(logger_config._routes_for('test.unconfigured.child'), [])
+
+
+
+class JsonFormatterTests(unittest.TestCase):
+    def test_timestamp_is_the_event_time(self):
+        record = logging.makeLogRecord({'msg': 'hello', 'levelname': 'INFO'})
+        record.created = 1700000000.123456
+        payload = json.loads(logger_config._json_formatter().format(record))
+        self.assertEqual(payload['timestamp'], "2023-11-14T22:13:20.123456Z")
+
+
+if __name__ == '__main__':
+    unittest.main()